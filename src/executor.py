@@ -28,9 +28,768 @@ GEMINI API USAGE (Multiple Integration Points):
 - Multi-model fallback           : gemini-2.5-flash → 2.0-flash → flash-latest → pro-latest
 """
 
+import asyncio
+import functools
+import hashlib
+import json
+import logging
 import os
 import re
-import google.generativeai as genai
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import google.ai.generativelanguage as glm
+from google.api_core import exceptions as google_exceptions
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+# Optional RE2 engine: linear-time matching with no catastrophic backtracking,
+# and a genuine single pass over the fused alternations below.
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+
+# RE2 only agrees with re on ASCII text: it does not fold case across scripts
+# the way re.IGNORECASE does (İ, ı, ſ and the Kelvin sign K match i, s and k
+# there), and its \d, \w and \b are ASCII-only. Its \s also lacks \v and
+# \x1c-\x1f, so RE2 patterns spell out re's ASCII whitespace instead. Text
+# that is not ASCII is always matched with the stdlib patterns.
+_ASCII_SPACE = r"\t\n\x0b\x0c\r\x1c-\x1f "
+
+
+def _re2_pattern(pattern):
+    """Rewrite \\s and \\S in pattern to match exactly re's ASCII whitespace."""
+    out = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escape = pattern[i:i + 2]
+            if escape == r"\s":
+                out.append(_ASCII_SPACE if in_class else f"[{_ASCII_SPACE}]")
+            elif escape == r"\S" and not in_class:
+                out.append(f"[^{_ASCII_SPACE}]")
+            else:
+                out.append(escape)
+            i += 2
+            continue
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def _compile_scanner(pattern, ignore_case=True):
+    """Compile a search pattern, on RE2 when available (ASCII text only)."""
+    if RE2_AVAILABLE:
+        try:
+            return re2.compile(("(?i)" if ignore_case else "") + _re2_pattern(pattern))
+        except re2.error:
+            pass
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+
+_UPPER_OR_ESCAPE = re.compile(r"\\.|[A-Z]")
+
+
+def _fold_pattern(pattern):
+    """Lowercase a pattern's literals and ranges, leaving escapes like \\S intact."""
+    return _UPPER_OR_ESCAPE.sub(
+        lambda match: match.group(0) if len(match.group(0)) == 2 else match.group(0).lower(),
+        pattern
+    )
+
+
+# Regex tables are compiled once at import so the detection agents only pay
+# for matching, not for re-parsing their patterns on every request.
+_SECRET_SOURCES = (
+    ("OpenAI API Key", r"sk-[a-zA-Z0-9]{20,}"),
+    ("AWS Access Key", r"AKIA[0-9A-Z]{16}"),
+    ("Private Key", r"-----BEGIN (RSA |EC |DSA )?PRIVATE KEY-----"),
+    ("Generic API Key", r"api[_-]?key['\"]?\s*[:=]\s*['\"]?[a-zA-Z0-9]{16,}"),
+    ("Bearer Token", r"Bearer\s+[a-zA-Z0-9\-._~+/]+=*"),
+    ("GitHub Token", r"ghp_[a-zA-Z0-9]{36}"),
+    ("Slack Token", r"xox[baprs]-[a-zA-Z0-9]{10,}"),
+    ("Google API Key", r"AIza[0-9A-Za-z\-_]{35}"),
+    ("Password in URL", r"://([^:]+):([^@]+)@"),
+)
+_SECRET_PATTERNS = [(name, _compile_scanner(pattern)) for name, pattern in _SECRET_SOURCES]
+_UNICODE_SECRET_PATTERNS = [
+    (name, re.compile(pattern, re.IGNORECASE)) for name, pattern in _SECRET_SOURCES
+]
+
+# Substitution keeps the stdlib engine: the replacement templates and the
+# ordered re-scans below are defined in terms of re semantics.
+_SANITIZE_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), replacement)
+    for pattern, replacement in (
+        (r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL_REDACTED]'),
+        (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE_REDACTED]'),
+        (r'\b\d{3}-\d{2}-\d{4}\b', '[SSN_REDACTED]'),
+        (r'(social\s+sec\w*\s+number\s+(?:is\s+)?)\S+', r'\1[SSN_REDACTED]'),
+        (r'password\s*[=:]\s*["\']?([^"\'\s]+)["\']?', 'password=[REDACTED]'),
+        (r'passwd\s*[=:]\s*["\']?([^"\'\s]+)["\']?', 'passwd=[REDACTED]'),
+        (r'pwd\s*[=:]\s*["\']?([^"\'\s]+)["\']?', 'pwd=[REDACTED]'),
+        (r'token\s*[=:]\s*["\']?([^"\'\s]+)["\']?', 'token=[REDACTED]'),
+        (r'Bearer\s+[a-zA-Z0-9\-._~+/]+=*', 'Bearer [TOKEN_REDACTED]'),
+        (r'://([^:]+):([^@]+)@', '://[USER]:[PASSWORD]@'),
+    )
+]
+
+_PII_SOURCES = (
+    ("email", r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    ("phone", r'\b(\+1[-.]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b'),
+    ("ssn", r'\b\d{3}-\d{2}-\d{4}\b'),
+)
+_PII_PATTERNS = [(pii_type, _compile_scanner(pattern)) for pii_type, pattern in _PII_SOURCES]
+_UNICODE_PII_PATTERNS = [
+    (pii_type, re.compile(pattern, re.IGNORECASE)) for pii_type, pattern in _PII_SOURCES
+]
+
+# Detection on ASCII text runs case-sensitive lowercase patterns against one
+# lowered copy of the text instead of folding case inside the engine. ASCII
+# lowering keeps every offset, so matched values are sliced from the original.
+# RE2 folds case inside its automaton for free, so its fused scans use the
+# original text unless the lowered copy is needed anyway.
+_FOLDED_SECRET_PATTERNS = [
+    (name, _compile_scanner(_fold_pattern(pattern), ignore_case=False))
+    for name, pattern in _SECRET_SOURCES
+]
+_FOLDED_PII_PATTERNS = [
+    (pii_type, _compile_scanner(_fold_pattern(pattern), ignore_case=False))
+    for pii_type, pattern in _PII_SOURCES
+]
+
+
+# Lowercase literal markers per pattern, in table order: a pattern can only
+# match text containing one of its markers. An empty tuple means "always run".
+# Plain substring checks beat running the regexes on re; with RE2 the fused
+# alternation is already a single literal-accelerated pass and goes first.
+_DIGITS = tuple("0123456789")
+_SECRET_MARKERS = (
+    ("sk-",), ("akia",), ("-----begin ",), ("api",), ("bearer",),
+    ("ghp_",), ("xox",), ("aiza",), ("://",),
+)
+_PII_MARKERS = (("@",), _DIGITS, ("-",))
+# Digit-shaped PII is found by literal search over a "shape" of the ASCII
+# text (digits -> 0, the [-.\s] separators -> '.', all else -> x): every
+# phone number holds 000.0000 or 0000000 and every SSN holds 000.00.0000.
+# The real pattern then only runs on a short span around each hit.
+_SHAPE_TABLE = bytes(
+    ord("0") if chr(byte).isdigit() else
+    ord(".") if chr(byte) in "-." or chr(byte).isspace() else ord("x")
+    for byte in range(256)
+)
+_SHAPE_REACH = 32  # longer than any phone/SSN match
+_PII_SHAPES = {1: (b"000.0000", b"0000000"), 2: (b"000.00.0000",)}
+_SANITIZE_MARKERS = (
+    ("@",), _DIGITS, ("-",), ("social",), ("password",), ("passwd",),
+    ("pwd",), ("token",), ("bearer",), ("://",),
+)
+
+
+# Long inputs are scanned in cache-sized windows: detection stops at the first
+# window holding a secret and never folds or encodes the whole text at once.
+# Windows overlap, so any match shorter than the overlap lies wholly in one.
+_SCAN_CHUNK = 64 * 1024
+_SCAN_OVERLAP = 4 * 1024
+
+# Patterns with no bound on their match length can outgrow the overlap, and
+# then no window holds the whole match (a URL password longer than 4K, say).
+# When windows do not settle them, these are searched on the full text: every
+# secret marker is the literal start of its match, so from its first marker;
+# an email can start anywhere before its '@', so from the start of the text.
+_UNBOUNDED_SECRETS = tuple(
+    index for index, (name, _) in enumerate(_SECRET_SOURCES)
+    if name in ("OpenAI API Key", "Generic API Key", "Bearer Token", "Slack Token", "Password in URL")
+)
+_UNBOUNDED_SECRET_MARKERS = [
+    (index, re.compile("|".join(re.escape(marker) for marker in _SECRET_MARKERS[index]), re.IGNORECASE))
+    for index in _UNBOUNDED_SECRETS
+]
+_EMAIL_PATTERN = dict(_UNICODE_PII_PATTERNS)["email"]
+
+
+def _windows(text):
+    """
+    Yield (offset, window, pos, last) for overlapping windows over long text.
+
+    Each window carries one character of left context so word boundaries see
+    the preceding character; scanning starts at pos inside the window.
+    """
+    step = _SCAN_CHUNK - _SCAN_OVERLAP
+    start = 0
+    while True:
+        end = min(len(text), start + _SCAN_CHUNK)
+        offset = max(0, start - 1)
+        yield offset, text[offset:end], start - offset, end == len(text)
+        if end == len(text):
+            return
+        start += step
+
+
+def _fold(text):
+    """
+    Lowercased copy of text, or None when text is not ASCII.
+
+    Only ASCII text is folded, since there str.lower() maps characters one to
+    one exactly as the case-insensitive patterns do.
+    """
+    return text.lower() if text.isascii() else None
+
+
+def _marked(lower_text, markers):
+    """Indexes of the patterns whose literal markers occur in the folded text."""
+    if lower_text is None:
+        return range(len(markers))
+    return [
+        index for index, literals in enumerate(markers)
+        if not literals or any(literal in lower_text for literal in literals)
+    ]
+
+
+def _combine(named_patterns, ignore_case=True):
+    """Fuse (group name, pattern) pairs into one alternation with named groups."""
+    return _compile_scanner(
+        "|".join(f"(?P<{name}>{pattern})" for name, pattern in named_patterns),
+        ignore_case
+    )
+
+
+# Each family is also fused into a single alternation so one scan over the
+# text replaces one scan per pattern; the matching group names the pattern.
+# Fused scans only pay off on an automaton engine: CPython's backtracking re
+# tries every branch at every offset and loses the literal-prefix skip it gets
+# on the separate patterns, so with plain re the per-pattern scans are kept.
+_FUSED_SCANS = RE2_AVAILABLE
+_SECRET_GROUPS = {f"secret{i}": i for i in range(len(_SECRET_SOURCES))}
+_COMBINED_SECRETS = _combine(
+    (f"secret{i}", pattern) for i, (_, pattern) in enumerate(_SECRET_SOURCES)
+)
+_COMBINED_SANITIZE = _combine(
+    (f"rule{i}", pattern.pattern) for i, (pattern, _) in enumerate(_SANITIZE_PATTERNS)
+)
+_FOLDED_COMBINED_PII = _combine(
+    ((pii_type, _fold_pattern(pattern)) for pii_type, pattern in _PII_SOURCES),
+    ignore_case=False
+)
+
+# On RE2 one pattern set reports every secret, PII and SSN-keyword pattern
+# occurring anywhere in the text from a single automaton pass; scan_text()
+# then only re-runs the one secret pattern whose span it reports.
+_SSN_KEYWORDS = ("social sec", "number")
+_SCAN_SET_SOURCES = (
+    tuple(pattern for _, pattern in _SECRET_SOURCES)
+    + tuple(pattern for _, pattern in _PII_SOURCES)
+    + _SSN_KEYWORDS
+)
+_SCAN_SET_PII = len(_SECRET_SOURCES)
+_SCAN_SET_KEYWORDS = _SCAN_SET_PII + len(_PII_SOURCES)
+
+
+def _compile_set(patterns):
+    """Compile case-insensitive patterns into an RE2 set, or None without RE2."""
+    if not RE2_AVAILABLE:
+        return None
+    try:
+        pattern_set = re2.Set.SearchSet()
+        for pattern in patterns:
+            pattern_set.Add("(?i)" + _re2_pattern(pattern))
+        pattern_set.Compile()
+    except re2.error:
+        return None
+    return pattern_set
+
+
+_SCAN_SET = _compile_set(_SCAN_SET_SOURCES)
+
+# Markdown clean-up applied to Gemini responses
+_MD_CODE = re.compile(r'```.*?```', re.DOTALL)
+# Single-character markup is deleted with str.translate rather than a regex
+_MD_STYLE = str.maketrans('', '', '*_')
+_MD_EXPLANATION = str.maketrans('', '', '*_#-[]')
+
+# Invariant prompt text, built once; requests only append their variable parts
+_SANITIZE_PROMPT_PREFIX = """You are a security-aware assistant.
+
+Your task:
+Rewrite the input text to REMOVE or MASK any sensitive information
+such as API keys, secrets, tokens, passwords, private keys, emails,
+phone numbers, or personally identifiable information (PII).
+
+Rules:
+- Preserve the original intent and meaning
+- Replace sensitive data with placeholders like [REDACTED] or [EMAIL_MASKED]
+- Do NOT add explanations or warnings
+- Do NOT mention security policies
+- Do NOT format the output with markdown
+- Return ONLY the rewritten text
+
+Input:
+"""
+
+# Pre-built proto for the masking prefix; each call only adds the input part
+_SANITIZE_PROMPT_PART = glm.Part(text=_SANITIZE_PROMPT_PREFIX)
+
+_SMART_PROMPT_PREFIX = """You are a privacy-preserving text rewriter.
+
+Your task:
+Rewrite the input text to REMOVE all personally identifiable information (PII) while preserving the meaning and making the text natural and useful.
+
+PII types detected: """
+
+_SMART_PROMPT_RULES = """
+
+IMPORTANT RULES:
+1. Replace PII with NATURAL LANGUAGE equivalents, NOT placeholders like [REDACTED]
+2. Preserve the original meaning and context
+3. Make the text flow naturally as if it was written that way originally
+4. Use generic references (e.g., "the contact", "the customer", "the sales representative")
+5. Return ONLY the rewritten text, NO explanations or notes
+6. Do NOT use markdown formatting
+7. Keep the same tone and style as the original
+
+Examples of good transformations:
+- "Email sarah.johnson@acme.com" → "Email the sales contact"
+- "Contact John at 555-0123" → "Contact them by phone"
+- "John Smith (SSN: 123-45-6789)" → "Customer (identifier redacted)"
+- "Call me at 555-999-8888 or email test@example.com" → "You can reach them by phone or email"
+
+Input text:
+"""
+
+_SMART_PROMPT_SUFFIX = """
+
+Rewritten text:"""
+
+_EXPLANATION_PROMPT_PREFIX = """Generate a 1-2 sentence plain-English explanation for this security decision.
+
+"""
+
+_EXPLANATION_PROMPT_SUFFIX = """
+
+Rules:
+- Write in plain English
+- NO markdown, bullets, or formatting
+- Explain WHY this decision was made
+- Keep it to 1-2 sentences maximum
+- Focus on the user's benefit
+
+Output only the explanation text:"""
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with optional TTL, byte budget and hit/miss counters.
+
+    The Gemini agents are pure functions of their inputs, so repeated or
+    duplicate content is answered from here instead of another API round-trip.
+    Keys are built from a SHA-256 digest of the text, never the raw text.
+    Values that hold large text pass their size to set() so max_bytes can
+    bound memory as well as the entry count.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, max_bytes=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at, size = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+            self.misses += 1
+            return None
+
+    def set(self, key, value, size=0):
+        """Store value under key, evicting the least recently used entries."""
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, time.monotonic(), size)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._bytes -= self._entries.popitem(last=False)[1][2]
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0
+            }
+
+
+def _text_key(text):
+    """Cache key for a piece of content."""
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "0")) or None
+_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Only successful LLM results are cached: a regex fallback caused by a missing
+# key or an outage must not keep being served once Gemini is reachable again.
+_SANITIZE_CACHE = ResultCache(_CACHE_SIZE, _CACHE_TTL, _CACHE_MAX_BYTES)
+_SMART_CACHE = ResultCache(_CACHE_SIZE, _CACHE_TTL, _CACHE_MAX_BYTES)
+_EXPLANATION_CACHE = ResultCache(_CACHE_SIZE, _CACHE_TTL)
+_REGEX_CACHE = ResultCache(_CACHE_SIZE, _CACHE_TTL, _CACHE_MAX_BYTES)
+
+# Detection results are small, so these are bounded by entry count alone.
+# The pipeline scans the same text several times (planner, short-circuit,
+# preflight), and every scan after the first is answered from here.
+_SECRETS_CACHE = ResultCache(_CACHE_SIZE, _CACHE_TTL)
+_PII_CACHE = ResultCache(_CACHE_SIZE, _CACHE_TTL)
+
+
+def cache_stats():
+    """Hit/miss statistics for every executor result cache."""
+    return {
+        "sanitize": _SANITIZE_CACHE.stats(),
+        "smart_sanitize": _SMART_CACHE.stats(),
+        "explanation": _EXPLANATION_CACHE.stats(),
+        "regex_sanitize": _REGEX_CACHE.stats(),
+        "detect_secrets": _SECRETS_CACHE.stats(),
+        "detect_pii": _PII_CACHE.stats()
+    }
+
+
+def clear_caches():
+    """Empty every executor result cache."""
+    for cache in (_SANITIZE_CACHE, _SMART_CACHE, _EXPLANATION_CACHE, _REGEX_CACHE,
+                  _SECRETS_CACHE, _PII_CACHE):
+        cache.clear()
+
+
+# sanitize_with_gemini returns the regex result directly when it is already clean
+_REGEX_SHORT_CIRCUIT = os.getenv("SKIP_LLM_WHEN_REGEX_CLEAN", "true").lower() == "true"
+
+# Gemini calls run on a shared pool so fallback models can be raced instead of
+# tried one after another; each attempt is also bounded by its own timeout.
+_GEMINI_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GEMINI_MAX_WORKERS", "16")),
+    thread_name_prefix="gemini"
+)
+_HEDGE_DELAY = float(os.getenv("GEMINI_HEDGE_DELAY", "0.8"))
+_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", "2"))
+_ATTEMPT_TIMEOUT = float(os.getenv("GEMINI_ATTEMPT_TIMEOUT", "20"))
+
+
+class _ModelHealth:
+    """Rolling per-model latency and failure rates used to order fallbacks."""
+
+    def __init__(self, alpha=0.3, cooldown=60.0):
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_name, latency, ok):
+        """Fold one attempt into the model's moving averages."""
+        with self._lock:
+            stats = self._stats.setdefault(
+                model_name, {"latency": None, "failure": 0.0, "failed_at": 0.0}
+            )
+            if ok:
+                previous = stats["latency"]
+                stats["latency"] = latency if previous is None else previous + self.alpha * (latency - previous)
+                stats["failure"] -= self.alpha * stats["failure"]
+            else:
+                stats["failure"] += self.alpha * (1.0 - stats["failure"])
+                stats["failed_at"] = time.monotonic()
+
+    def rank(self, models):
+        """
+        Order candidate models: healthy ones by latency, then untried ones in
+        configured order, then models that have been failing recently.
+        """
+        now = time.monotonic()
+
+        def key(item):
+            index, model_name = item
+            stats = self._stats.get(model_name)
+            if stats is None:
+                return (1, index)
+            if stats["failure"] >= 0.5 and now - stats["failed_at"] < self.cooldown:
+                return (2, stats["failure"])
+            if stats["latency"] is None:
+                return (1, index)
+            return (0, stats["latency"])
+
+        with self._lock:
+            return [model_name for _, model_name in sorted(enumerate(models), key=key)]
+
+
+_MODEL_HEALTH = _ModelHealth()
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now):
+        """Take one token if available; never blocks."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+# Fallback chains, in order of preference (prioritize models with available quota)
+DEFAULT_MODELS = (
+    'gemini-2.5-flash-lite',      # Has quota available
+    'gemini-1.5-flash',            # Backup option
+    'gemini-1.5-flash-8b',         # Another backup
+    'gemini-flash-latest',         # Fallback
+    'gemini-2.5-flash',            # May be rate limited
+    'gemini-2.0-flash',            # May be rate limited
+    'gemini-pro-latest'            # Last resort
+)
+EXPLANATION_MODELS = ('gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-flash-latest')
+
+# Free-tier requests per minute; GEMINI_RPM overrides every model
+_MODEL_RPM = {
+    'gemini-2.5-flash-lite': 15,
+    'gemini-1.5-flash': 15,
+    'gemini-1.5-flash-8b': 15,
+    'gemini-flash-latest': 10,
+    'gemini-2.5-flash': 10,
+    'gemini-2.0-flash': 15,
+    'gemini-pro-latest': 5
+}
+_DEFAULT_RPM = 10
+_RATE_LIMIT_COOLDOWN = float(os.getenv("GEMINI_RATE_LIMIT_COOLDOWN", "60"))
+
+
+class KeyPool:
+    """
+    Rotate requests across Gemini API keys, staying under per-model quotas.
+
+    Each (key, model) pair has its own token bucket sized to the model's
+    requests-per-minute limit, so the pool's effective throughput grows with
+    the number of keys. A pair that receives a 429 is benched for a cooldown.
+    """
+
+    def __init__(self, keys, rpm=None, cooldown=_RATE_LIMIT_COOLDOWN):
+        self.keys = tuple(keys)
+        self.rpm = rpm
+        self.cooldown = cooldown
+        self._buckets = {}
+        self._benched_until = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, model_name):
+        """Return a key with quota left for model_name, or None if all are exhausted."""
+        now = time.monotonic()
+        with self._lock:
+            for offset in range(len(self.keys)):
+                key = self.keys[(self._next + offset) % len(self.keys)]
+                if self._benched_until.get((key, model_name), 0.0) > now:
+                    continue
+                bucket = self._buckets.get((key, model_name))
+                if bucket is None:
+                    rpm = self.rpm or _MODEL_RPM.get(model_name, _DEFAULT_RPM)
+                    bucket = self._buckets[(key, model_name)] = TokenBucket(rpm / 60.0, rpm)
+                if bucket.try_acquire(now):
+                    self._next = (self._next + offset + 1) % len(self.keys)
+                    return key
+            return None
+
+    def penalize(self, key, model_name):
+        """Bench a (key, model) pair after the provider rate-limited it."""
+        with self._lock:
+            self._benched_until[(key, model_name)] = time.monotonic() + self.cooldown
+
+
+def _configured_keys():
+    """API keys from GEMINI_API_KEYS (comma-separated) or GEMINI_API_KEY."""
+    keys = os.getenv("GEMINI_API_KEYS") or os.getenv("GEMINI_API_KEY") or ""
+    return tuple(key.strip() for key in keys.split(",") if key.strip())
+
+
+# Clients are built once per key and reused, so requests share a transport
+# instead of rebuilding it per call. Requests go to the generativelanguage
+# client directly: the genai SDK can only bind a process-wide default
+# client, not one per key. Keys are read lazily because .env is loaded
+# after this module is imported.
+_CLIENT_LOCK = threading.Lock()
+_KEY_POOL = None
+_CLIENTS = {}
+
+
+def _key_pool():
+    """Return the KeyPool for the currently configured keys."""
+    global _KEY_POOL
+    keys = _configured_keys()
+    with _CLIENT_LOCK:
+        if _KEY_POOL is None or _KEY_POOL.keys != keys:
+            rpm = os.getenv("GEMINI_RPM")
+            _KEY_POOL = KeyPool(keys, rpm=int(rpm) if rpm else None)
+        return _KEY_POOL
+
+
+def _primary_key():
+    """First configured API key, or None when Gemini is not configured."""
+    keys = _configured_keys()
+    return keys[0] if keys else None
+
+
+def _get_client(api_key=None):
+    """Return the cached GenerativeServiceClient for api_key."""
+    if api_key is None:
+        api_key = _primary_key()
+    with _CLIENT_LOCK:
+        client = _CLIENTS.get(api_key)
+        if client is None:
+            client = _CLIENTS[api_key] = glm.GenerativeServiceClient(
+                client_options={"api_key": api_key}
+            )
+        return client
+
+
+def _generate_text(client, model_name, prompt, timeout=None):
+    """
+    Send one generateContent request on client and return the reply text.
+
+    Args:
+        client (glm.GenerativeServiceClient): Client bound to an API key
+        model_name (str): Model name, with or without the "models/" prefix
+        prompt (str | list): The prompt text or request contents to send
+        timeout (float): Request timeout in seconds
+
+    Returns:
+        str: Text of the first candidate
+
+    Raises:
+        ValueError: If the reply has no text (e.g. it was blocked)
+    """
+    if isinstance(prompt, str):
+        prompt = [glm.Content(role="user", parts=[glm.Part(text=prompt)])]
+    if "/" not in model_name:
+        model_name = "models/" + model_name
+    response = client.generate_content(
+        glm.GenerateContentRequest(model=model_name, contents=prompt), timeout=timeout
+    )
+    if not response.candidates or not response.candidates[0].content.parts:
+        raise ValueError(f"{model_name} returned no text")
+    return "".join(part.text for part in response.candidates[0].content.parts)
+
+
+def _generate(model_name, prompt):
+    """Single Gemini attempt; records its outcome and returns the response text."""
+    pool = _key_pool()
+    api_key = pool.acquire(model_name)
+    if api_key is None:
+        raise RuntimeError(f"client-side rate limit reached for {model_name}")
+
+    started = time.monotonic()
+    try:
+        text = _generate_text(_get_client(api_key), model_name, prompt, _ATTEMPT_TIMEOUT)
+    except Exception as e:
+        if isinstance(e, google_exceptions.TooManyRequests):
+            pool.penalize(api_key, model_name)
+        _MODEL_HEALTH.record(model_name, time.monotonic() - started, False)
+        raise
+    _MODEL_HEALTH.record(model_name, time.monotonic() - started, True)
+    return text
+
+
+def _call_gemini(prompt, models=DEFAULT_MODELS, purpose="sanitization"):
+    """
+    Race candidate models with staggered launches; the first success wins.
+
+    The best-ranked model starts first. If it has not answered within the
+    hedge delay the next one is launched alongside it (up to a cap of
+    in-flight attempts), and every failure launches the next candidate.
+
+    Args:
+        prompt (str | list): The prompt text or request contents to send
+        models (tuple): Model names in configured preference order
+        purpose (str): Label used in failure logs
+
+    Returns:
+        tuple: (model_name, response_text), or (None, None) if every model failed
+    """
+    candidates = iter(_MODEL_HEALTH.rank(models))
+    in_flight = {}
+
+    def launch():
+        model_name = next(candidates, None)
+        if model_name is None:
+            return False
+        in_flight[_GEMINI_POOL.submit(_generate, model_name, prompt)] = model_name
+        return True
+
+    launch()
+    while in_flight:
+        done, _ = wait(in_flight, timeout=_HEDGE_DELAY, return_when=FIRST_COMPLETED)
+        for future in done:
+            model_name = in_flight.pop(future)
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.debug("Model %s failed for %s: %.100s", model_name, purpose, e)
+                continue
+            for pending in in_flight:
+                pending.cancel()
+            return model_name, text
+
+        # Replace each failed attempt, or hedge a slow one, within the cap
+        for _ in range(len(done) or 1):
+            if len(in_flight) >= _MAX_IN_FLIGHT or not launch():
+                break
+
+    return None, None
 
 
 def detect_secrets(text):
@@ -46,29 +805,98 @@ def detect_secrets(text):
     Returns:
         dict: Detection result with 'found' boolean and pattern details
     """
-    patterns = {
-        "OpenAI API Key": r"sk-[a-zA-Z0-9]{20,}",
-        "AWS Access Key": r"AKIA[0-9A-Z]{16}",
-        "Private Key": r"-----BEGIN (RSA |EC |DSA )?PRIVATE KEY-----",
-        "Generic API Key": r"api[_-]?key['\"]?\s*[:=]\s*['\"]?[a-zA-Z0-9]{16,}",
-        "Bearer Token": r"Bearer\s+[a-zA-Z0-9\-._~+/]+=*",
-        "GitHub Token": r"ghp_[a-zA-Z0-9]{36}",
-        "Slack Token": r"xox[baprs]-[a-zA-Z0-9]{10,}",
-        "Google API Key": r"AIza[0-9A-Za-z\-_]{35}",
-        "Password in URL": r"://([^:]+):([^@]+)@",
+    key = _text_key(text)
+    cached = _SECRETS_CACHE.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    if len(text) > _SCAN_CHUNK:
+        pattern_name, start, end = _first_secret_windowed(text)
+    else:
+        pattern_name, start, end = _first_secret(text)
+
+    result = _secret_result(text, pattern_name, start, end)
+    _SECRETS_CACHE.set(key, result)
+    return dict(result)
+
+
+def _secret_result(text, pattern_name, start, end):
+    """detect_secrets() result for a match span, or for no match."""
+    if pattern_name is None:
+        return {"found": False, "pattern": None}
+
+    # Preview straight from the span; a greedy match can run to megabytes
+    return {
+        "found": True,
+        "pattern": pattern_name,
+        "matched_value": text[start:start + 20] + "..." if end - start > 20 else text[start:end]
     }
 
-    for pattern_name, pattern in patterns.items():
-        match = re.search(pattern, text, re.IGNORECASE)
+
+def _first_secret(text, pos=0):
+    """Return (pattern name, start, end) of the highest-priority secret in text[pos:]."""
+    fused_match = None
+
+    if _FUSED_SCANS and text.isascii():
+        haystack, patterns = text, _SECRET_PATTERNS
+        fused_match = _COMBINED_SECRETS.search(text, pos)
+        if not fused_match:
+            return None, None, None
+        # The alternation finds the leftmost secret; patterns listed earlier
+        # in the table still take precedence when they match further on.
+        candidates = range(_SECRET_GROUPS[fused_match.lastgroup])
+    else:
+        lower_text = _fold(text)
+        if lower_text is None:
+            haystack, patterns = text, _UNICODE_SECRET_PATTERNS
+        else:
+            haystack, patterns = lower_text, _FOLDED_SECRET_PATTERNS
+        candidates = _marked(lower_text, _SECRET_MARKERS)
+
+    for index in candidates:
+        pattern_name, pattern = patterns[index]
+        match = pattern.search(haystack, pos)
         if match:
-            matched_text = match.group(0)
-            return {
-                "found": True,
-                "pattern": pattern_name,
-                "matched_value": matched_text[:20] + "..." if len(matched_text) > 20 else matched_text
-            }
+            return pattern_name, match.start(), match.end()
+
+    if fused_match:
+        pattern_name = patterns[_SECRET_GROUPS[fused_match.lastgroup]][0]
+        return pattern_name, fused_match.start(), fused_match.end()
+    return None, None, None
+
 
-    return {"found": False, "pattern": None}
+def _first_secret_windowed(text):
+    """
+    Return (pattern name, start, end) from the first window holding a secret.
+
+    The reported pattern is the highest-priority one within that window, so
+    a long text holding several kinds of secret may report a different (but
+    equally blocking) pattern than a whole-text scan would. Unbounded
+    patterns whose marker showed up in a window without a match there are
+    searched on the full text once no window holds a secret.
+    """
+    unsettled = {}  # unbounded pattern index -> offset of its first marker
+    for offset, window, pos, last in _windows(text):
+        pattern_name, start, end = _first_secret(window, pos)
+        if pattern_name is None:
+            if not last:
+                for index, marker in _UNBOUNDED_SECRET_MARKERS:
+                    if index not in unsettled:
+                        hit = marker.search(window, pos)
+                        if hit:
+                            unsettled[index] = offset + hit.start()
+            continue
+        if end == len(window) and not last:
+            # The match may run on past the window, so settle it on the rest of the text
+            return _first_secret(text, offset + pos)
+        return pattern_name, offset + start, offset + end
+
+    for index in sorted(unsettled):
+        pattern_name, pattern = _UNICODE_SECRET_PATTERNS[index]
+        match = pattern.search(text, unsettled[index])
+        if match:
+            return pattern_name, match.start(), match.end()
+    return None, None, None
 
 
 def regex_sanitize(text):
@@ -83,26 +911,41 @@ def regex_sanitize(text):
     Returns:
         str: Sanitized text with sensitive data masked
     """
-    patterns = [
-        (r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL_REDACTED]'),
-        (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE_REDACTED]'),
-        (r'\b\d{3}-\d{2}-\d{4}\b', '[SSN_REDACTED]'),
-        (r'(social\s+sec\w*\s+number\s+(?:is\s+)?)\S+', r'\1[SSN_REDACTED]'),
-        (r'password\s*[=:]\s*["\']?([^"\'\s]+)["\']?', 'password=[REDACTED]'),
-        (r'passwd\s*[=:]\s*["\']?([^"\'\s]+)["\']?', 'passwd=[REDACTED]'),
-        (r'pwd\s*[=:]\s*["\']?([^"\'\s]+)["\']?', 'pwd=[REDACTED]'),
-        (r'token\s*[=:]\s*["\']?([^"\'\s]+)["\']?', 'token=[REDACTED]'),
-        (r'Bearer\s+[a-zA-Z0-9\-._~+/]+=*', 'Bearer [TOKEN_REDACTED]'),
-        (r'://([^:]+):([^@]+)@', '://[USER]:[PASSWORD]@'),
-    ]
+    # One fused scan settles the common clean ASCII case. Dirty text still goes
+    # through the rules in order, since later rules re-scan earlier output.
+    if _FUSED_SCANS and text.isascii() and not _COMBINED_SANITIZE.search(text):
+        return text
+
+    # Rules whose literal markers are absent cannot fire; replacements never
+    # introduce a later rule's marker, so checking the input once is enough.
+    rules = _marked(_fold(text), _SANITIZE_MARKERS)
+    if not rules:
+        return text
+
+    key = _text_key(text)
+    cached = _REGEX_CACHE.get(key)
+    if cached is not None:
+        return cached
 
     sanitized = text
-    for pattern, replacement in patterns:
-        sanitized = re.sub(pattern, replacement, sanitized, flags=re.IGNORECASE)
+    for index in rules:
+        pattern, replacement = _SANITIZE_PATTERNS[index]
+        sanitized = pattern.sub(replacement, sanitized)
 
+    _REGEX_CACHE.set(key, sanitized, sys.getsizeof(sanitized))
     return sanitized
 
 
+def _sanitize_prompt(text):
+    """Masking prompt as plain text, for the batch request file."""
+    return _SANITIZE_PROMPT_PREFIX + text
+
+
+def _sanitize_contents(text):
+    """Masking prompt as request contents, reusing the pre-built prefix part."""
+    return [glm.Content(role="user", parts=[_SANITIZE_PROMPT_PART, glm.Part(text=text)])]
+
+
 def sanitize_with_gemini(text):
     """
     Execute Gemini API call for intelligent content sanitization.
@@ -111,6 +954,12 @@ def sanitize_with_gemini(text):
     Gemini API to intelligently identify and mask sensitive information
     while preserving the original intent of the content.
 
+    Regex short-circuit: unless SKIP_LLM_WHEN_REGEX_CLEAN is "false"
+    (_REGEX_SHORT_CIRCUIT), the text is first masked with regex_sanitize().
+    If the masked text has no secrets or PII left, it is returned without
+    calling Gemini, with model_used "no_op" (nothing needed masking) or
+    "regex" (regex masking was enough).
+
     Multi-model fallback strategy:
     1. gemini-2.5-flash (fastest, latest)
     2. gemini-2.0-flash (stable)
@@ -122,12 +971,27 @@ def sanitize_with_gemini(text):
         text (str): The text to sanitize
 
     Returns:
-        dict: Sanitization result with 'sanitized_text', 'used_llm', and 'model_used'
+        dict: Sanitization result with 'sanitized_text', 'used_llm', and
+        'model_used': the Gemini model name, "no_op" or "regex" from the
+        short-circuit, or "regex_fallback" when no API key is set or every
+        model failed
     """
-    api_key = os.getenv("GEMINI_API_KEY")
+    # Skip the LLM when deterministic masking already leaves nothing to find
+    if _REGEX_SHORT_CIRCUIT:
+        sanitized = regex_sanitize(text)
+        if not detect_secrets(sanitized)["found"] and not detect_pii(sanitized)["found"]:
+            if sanitized != text:
+                logger.debug("Regex masking left no sensitive data - skipping Gemini")
+            return {
+                "sanitized_text": sanitized,
+                "used_llm": False,
+                "model_used": "no_op" if sanitized == text else "regex"
+            }
+
+    api_key = _primary_key()
 
     if not api_key:
-        print("[EXECUTOR] No GEMINI_API_KEY found - using regex fallback")
+        logger.debug("No GEMINI_API_KEY found - using regex fallback")
         sanitized = regex_sanitize(text)
         return {
             "sanitized_text": sanitized,
@@ -135,66 +999,211 @@ def sanitize_with_gemini(text):
             "model_used": "regex_fallback"
         }
 
-    # Configure Gemini API
-    genai.configure(api_key=api_key)
-
-    # Try multiple models in order of preference (prioritize models with available quota)
-    models_to_try = [
-        'gemini-2.5-flash-lite',      # Has quota available
-        'gemini-1.5-flash',            # Backup option
-        'gemini-1.5-flash-8b',         # Another backup
-        'gemini-flash-latest',         # Fallback
-        'gemini-2.5-flash',            # May be rate limited
-        'gemini-2.0-flash',            # May be rate limited
-        'gemini-pro-latest'            # Last resort
-    ]
+    key = _text_key(text)
+    cached = _SANITIZE_CACHE.get(key)
+    if cached is not None:
+        return dict(cached)
 
-    for model_name in models_to_try:
-        try:
-            model = genai.GenerativeModel(model_name)
+    # Craft the sanitization prompt
+    prompt = _sanitize_contents(text)
 
-            # Craft the sanitization prompt
-            prompt = f"""You are a security-aware assistant.
+    # Call Gemini API, racing fallback models
+    model_name, response_text = _call_gemini(prompt)
+    if model_name is not None:
+        sanitized = regex_sanitize(response_text.strip())
 
-Your task:
-Rewrite the input text to REMOVE or MASK any sensitive information
-such as API keys, secrets, tokens, passwords, private keys, emails,
-phone numbers, or personally identifiable information (PII).
+        logger.debug("Successfully used Gemini model: %s", model_name)
+        result = {
+            "sanitized_text": sanitized,
+            "used_llm": True,
+            "model_used": model_name
+        }
+        _SANITIZE_CACHE.set(key, result, sys.getsizeof(sanitized))
+        return dict(result)
 
-Rules:
-- Preserve the original intent and meaning
-- Replace sensitive data with placeholders like [REDACTED] or [EMAIL_MASKED]
-- Do NOT add explanations or warnings
-- Do NOT mention security policies
-- Do NOT format the output with markdown
-- Return ONLY the rewritten text
+    # All Gemini models failed - use regex fallback
+    logger.warning("All Gemini models failed - using regex fallback")
+    sanitized = regex_sanitize(text)
+    return {
+        "sanitized_text": sanitized,
+        "used_llm": False,
+        "model_used": "regex_fallback"
+    }
 
-Input:
-{text}"""
 
-            # Call Gemini API
-            response = model.generate_content(prompt)
-            sanitized = regex_sanitize(response.text.strip())
+# Gemini Batch API (REST): half-price, asynchronous bulk generation
+_GEMINI_API_URL = "https://generativelanguage.googleapis.com"
+_BATCH_TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELLED", "EXPIRED")
 
-            print(f"[EXECUTOR] Successfully used Gemini model: {model_name}")
-            return {
-                "sanitized_text": sanitized,
+
+_HTTP_CLIENT = None
+
+
+def _http_client():
+    """Shared keep-alive HTTP client for the Gemini REST endpoints."""
+    global _HTTP_CLIENT
+    with _CLIENT_LOCK:
+        if _HTTP_CLIENT is None:
+            _HTTP_CLIENT = httpx.Client(base_url=_GEMINI_API_URL, timeout=120.0)
+        return _HTTP_CLIENT
+
+
+def sanitize_with_gemini_batch(texts, model_name="gemini-2.5-flash", poll_interval=30.0, timeout=86400.0):
+    """
+    Sanitize many texts through one Gemini Batch API job.
+
+    Meant for bulk work that can wait (log scrubbing, offline audits): batch
+    jobs are billed at half price but may take up to 24 hours. Duplicate
+    texts and texts already in the sanitization cache are not resubmitted,
+    and every result that comes back is cached for later online calls.
+    Texts the job does not answer fall back to regex masking.
+
+    Args:
+        texts (list): The texts to sanitize
+        model_name (str): Model to run the batch on
+        poll_interval (float): Seconds between job status checks
+        timeout (float): Seconds to wait for the job before giving up
+
+    Returns:
+        list: One sanitize_with_gemini-style result dict per input text, in order
+    """
+    api_key = _primary_key()
+
+    if not api_key:
+        logger.info("No GEMINI_API_KEY found - using regex fallback for batch")
+        return [
+            {"sanitized_text": regex_sanitize(text), "used_llm": False, "model_used": "regex_fallback"}
+            for text in texts
+        ]
+
+    results = [None] * len(texts)
+    pending = {}
+    positions = {}
+    for index, text in enumerate(texts):
+        key = _text_key(text)
+        cached = _SANITIZE_CACHE.get(key)
+        if cached is not None:
+            results[index] = dict(cached)
+            continue
+        pending[key] = text
+        positions.setdefault(key, []).append(index)
+
+    if pending:
+        try:
+            outputs = _run_sanitize_batch(api_key, model_name, pending, poll_interval, timeout)
+        except Exception as e:
+            logger.warning("Batch sanitization failed: %.100s", e)
+            outputs = {}
+
+        for key, response_text in outputs.items():
+            if key not in positions:
+                continue
+            result = {
+                "sanitized_text": regex_sanitize(response_text.strip()),
                 "used_llm": True,
                 "model_used": model_name
             }
+            _SANITIZE_CACHE.set(key, result, sys.getsizeof(result["sanitized_text"]))
+            for index in positions[key]:
+                results[index] = dict(result)
 
-        except Exception as e:
-            print(f"[EXECUTOR] Model {model_name} failed: {str(e)[:100]}")
+        logger.info("Batch sanitized %d/%d unique texts using: %s", len(outputs), len(pending), model_name)
+
+    for key, indexes in positions.items():
+        for index in indexes:
+            if results[index] is None:
+                results[index] = {
+                    "sanitized_text": regex_sanitize(pending[key]),
+                    "used_llm": False,
+                    "model_used": "regex_fallback"
+                }
+
+    return results
+
+
+def _run_sanitize_batch(api_key, model_name, pending, poll_interval, timeout):
+    """
+    Upload a JSONL of sanitization requests, run the batch job and collect output.
+
+    Returns:
+        dict: Response text keyed by the request key (SHA-256 of the input)
+    """
+    payload = "".join(
+        json.dumps({
+            "key": key,
+            "request": {"contents": [{"parts": [{"text": _sanitize_prompt(text)}]}]}
+        }) + "\n"
+        for key, text in pending.items()
+    ).encode("utf-8")
+
+    client = _http_client()
+    auth = {"x-goog-api-key": api_key}
+
+    # Resumable upload of the request file
+    start = client.post("/upload/v1beta/files", json={"file": {"display_name": "leaklock-sanitize-batch"}}, headers={
+        **auth,
+        "X-Goog-Upload-Protocol": "resumable",
+        "X-Goog-Upload-Command": "start",
+        "X-Goog-Upload-Header-Content-Length": str(len(payload)),
+        "X-Goog-Upload-Header-Content-Type": "application/jsonl"
+    })
+    start.raise_for_status()
+    upload = client.post(start.headers["x-goog-upload-url"], content=payload, headers={
+        **auth,
+        "X-Goog-Upload-Offset": "0",
+        "X-Goog-Upload-Command": "upload, finalize"
+    })
+    upload.raise_for_status()
+    input_file = upload.json()["file"]["name"]
+
+    created = client.post(f"/v1beta/models/{model_name}:batchGenerateContent", headers=auth, json={
+        "batch": {
+            "display_name": "leaklock-sanitize-batch",
+            "input_config": {"file_name": input_file}
+        }
+    })
+    created.raise_for_status()
+    batch_name = created.json()["name"]
+    logger.info("Submitted batch %s with %d texts", batch_name, len(pending))
+
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f"/v1beta/{batch_name}", headers=auth)
+        status.raise_for_status()
+        batch = status.json()
+        state = batch.get("metadata", {}).get("state") or batch.get("state", "")
+        if batch.get("done") or state.endswith(_BATCH_TERMINAL_STATES):
+            break
+        if time.monotonic() >= deadline:
+            client.post(f"/v1beta/{batch_name}:cancel", headers=auth)
+            raise TimeoutError(f"batch {batch_name} still {state or 'pending'} after {timeout}s")
+        time.sleep(poll_interval)
+
+    responses_file = (
+        batch.get("response", {}).get("responsesFile")
+        or batch.get("metadata", {}).get("output", {}).get("responsesFile")
+    )
+    if not responses_file:
+        logger.warning("Batch %s finished as %s without results", batch_name, state or "unknown")
+        return {}
+
+    download = client.get(f"/download/v1beta/{responses_file}:download", headers=auth, params={"alt": "media"})
+    download.raise_for_status()
+
+    outputs = {}
+    for line in download.text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        try:
+            parts = record["response"]["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError, TypeError):
             continue
+        response_text = "".join(part.get("text", "") for part in parts)
+        if response_text:
+            outputs[record.get("key")] = response_text
 
-    # All Gemini models failed - use regex fallback
-    print("[EXECUTOR] All Gemini models failed - using regex fallback")
-    sanitized = regex_sanitize(text)
-    return {
-        "sanitized_text": sanitized,
-        "used_llm": False,
-        "model_used": "regex_fallback"
-    }
+    return outputs
 
 
 def test_gemini_connection():
@@ -204,7 +1213,7 @@ def test_gemini_connection():
     Returns:
         dict: Connection test result
     """
-    api_key = os.getenv("GEMINI_API_KEY")
+    api_key = _primary_key()
 
     if not api_key:
         return {
@@ -213,15 +1222,13 @@ def test_gemini_connection():
         }
 
     try:
-        genai.configure(api_key=api_key)
         # Use model with available quota
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content("Say 'Hello from Gemini!'")
+        response_text = _generate_text(_get_client(), 'gemini-1.5-flash', "Say 'Hello from Gemini!'")
 
         return {
             "success": True,
             "message": "Gemini API connection successful",
-            "response": response.text.strip()
+            "response": response_text.strip()
         }
     except Exception as e:
         return {
@@ -247,28 +1254,169 @@ def detect_pii(text):
     Returns:
         dict: Detection result with 'found' boolean and list of 'types'
     """
-    pii_patterns = {
-        "email": r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Z|a-z]{2,}\b',
-        "phone": r'\b(\+1[-.]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b',
-        "ssn": r'\b\d{3}-\d{2}-\d{4}\b',
-    }
-
-    found_types = []
+    key = _text_key(text)
+    cached = _PII_CACHE.get(key)
+    if cached is not None:
+        return {"found": cached["found"], "types": list(cached["types"])}
+
+    if len(text) > _SCAN_CHUNK:
+        matched = set()
+        social = number = at_sign = False
+        for _, window, pos, last in _windows(text):
+            window_matched, lower_window = _pii_in(window, pos, last)
+            matched |= window_matched
+            social = social or "social sec" in lower_window
+            number = number or "number" in lower_window
+            at_sign = at_sign or "@" in lower_window
+        # An email longer than the window overlap is held whole by no window
+        if at_sign and "email" not in matched and _EMAIL_PATTERN.search(text):
+            matched.add("email")
+    else:
+        matched, lower_text = _pii_in(text)
+        social = "social sec" in lower_text
+        number = "number" in lower_text
 
-    for pii_type, pattern in pii_patterns.items():
-        if re.search(pattern, text, re.IGNORECASE):
-            found_types.append(pii_type)
+    found_types = [pii_type for pii_type, _ in _PII_PATTERNS if pii_type in matched]
 
-    lower_text = text.lower()
-    if "social sec" in lower_text and "number" in lower_text:
+    if social and number:
         found_types.append("ssn_keyword")
 
+    _PII_CACHE.set(key, {"found": len(found_types) > 0, "types": tuple(found_types)})
     return {
         "found": len(found_types) > 0,
         "types": found_types
     }
 
 
+def _pii_in(text, pos=0, last=True):
+    """
+    Return (PII types matched in text[pos:], lowered text).
+
+    Unless this is the last window, a match that runs into the end of text
+    is ignored; the next window holds it whole.
+    """
+    lower_text = _fold(text)
+    if lower_text is None:
+        haystack, patterns, combined = text, _UNICODE_PII_PATTERNS, None
+    else:
+        haystack, patterns, combined = lower_text, _FOLDED_PII_PATTERNS, _FOLDED_COMBINED_PII
+
+    matched = set()
+    if _FUSED_SCANS and combined is not None:
+        for match in combined.finditer(haystack, pos):
+            if not last and match.end() == len(haystack):
+                continue
+            matched.add(match.lastgroup)
+            if len(matched) == len(patterns):
+                break
+        # The alternation only reports non-overlapping matches, so a type whose
+        # every match overlaps another's (a phone number inside an email
+        # address) is searched for on its own. No match at all means no type can.
+        if matched:
+            for pii_type, pattern in patterns:
+                if pii_type not in matched and _search_whole(pattern, haystack, pos, last):
+                    matched.add(pii_type)
+    else:
+        shape = None
+        for index in _marked(lower_text, _PII_MARKERS):
+            pii_type, pattern = patterns[index]
+            if lower_text is not None and index in _PII_SHAPES:
+                if shape is None:
+                    shape = lower_text.encode("ascii").translate(_SHAPE_TABLE)
+                if _shape_search(pattern, haystack, shape, _PII_SHAPES[index], pos, last):
+                    matched.add(pii_type)
+                continue
+            if _search_whole(pattern, haystack, pos, last):
+                matched.add(pii_type)
+
+    return matched, lower_text if lower_text is not None else text.lower()
+
+
+def _search_whole(pattern, haystack, pos, last):
+    """
+    Whether pattern matches haystack[pos:] with a match that is not cut short.
+
+    Unless this is the last window, a match running into the end of haystack
+    does not count; the next window holds it whole.
+    """
+    match = pattern.search(haystack, pos)
+    while match and not last and match.end() == len(haystack):
+        match = pattern.search(haystack, match.start() + 1)
+    return match is not None
+
+
+def _shape_search(pattern, haystack, shape, triggers, pos, last):
+    """
+    Whether pattern matches haystack[pos:], trying only spans around triggers.
+
+    Each span reaches one character past any possible match, so a match that
+    ends exactly at the span end was cut short and is searched again.
+    """
+    for trigger in triggers:
+        hit = shape.find(trigger, pos)
+        while hit != -1:
+            lo = max(pos, hit - _SHAPE_REACH)
+            hi = min(len(haystack), hit + len(trigger) + _SHAPE_REACH + 1)
+            match = pattern.search(haystack, lo, hi)
+            while match and match.end() == hi and (hi < len(haystack) or not last):
+                match = pattern.search(haystack, match.start() + 1, hi)
+            if match:
+                return True
+            hit = shape.find(trigger, hit + 1)
+    return False
+
+
+def scan_text(text):
+    """
+    Run secrets and PII detection together over one piece of content.
+
+    With RE2 a single pattern-set pass finds which secret and PII patterns
+    occur anywhere in ASCII text; otherwise this falls back to the separate
+    agents. Both results land in the detection caches, so later
+    detect_secrets() / detect_pii() calls on the same text are free.
+
+    Args:
+        text (str): The text to analyze
+
+    Returns:
+        dict: {'secrets': detect_secrets() result, 'pii': detect_pii() result}
+    """
+    if _SCAN_SET is None or not text.isascii():
+        return {"secrets": detect_secrets(text), "pii": detect_pii(text)}
+
+    key = _text_key(text)
+    secrets = _SECRETS_CACHE.get(key)
+    pii = _PII_CACHE.get(key)
+    if secrets is None or pii is None:
+        hits = set(_SCAN_SET.Match(text) or ())
+
+        if secrets is None:
+            # The lowest index is the highest-priority secret pattern present
+            first = min((index for index in hits if index < _SCAN_SET_PII), default=None)
+            if first is None:
+                secrets = _secret_result(text, None, None, None)
+            else:
+                pattern_name, pattern = _SECRET_PATTERNS[first]
+                match = pattern.search(text)
+                secrets = _secret_result(text, pattern_name, match.start(), match.end())
+            _SECRETS_CACHE.set(key, secrets)
+
+        if pii is None:
+            found_types = [
+                pii_type for index, (pii_type, _) in enumerate(_PII_PATTERNS, _SCAN_SET_PII)
+                if index in hits
+            ]
+            if all(index in hits for index in range(_SCAN_SET_KEYWORDS, len(_SCAN_SET_SOURCES))):
+                found_types.append("ssn_keyword")
+            pii = {"found": len(found_types) > 0, "types": tuple(found_types)}
+            _PII_CACHE.set(key, pii)
+
+    return {
+        "secrets": dict(secrets),
+        "pii": {"found": pii["found"], "types": list(pii["types"])}
+    }
+
+
 def evaluate_policy(use_case, secrets_found, pii_found, pii_types):
     """
     AGENT 2: Policy Evaluation Agent
@@ -354,24 +1502,13 @@ def calculate_risk_score(secrets_found, pii_found, pii_types, sanitization_appli
     Returns:
         int: Risk score from 0 to 100
     """
-    score = 0
+    # Secrets +95, PII +30 per type, sanitization -50, clamped to 0-100;
+    # bool() keeps it a single integer expression with no branching
+    score = (95 * bool(secrets_found)
+             + 30 * bool(pii_found) * len(pii_types or ())
+             - 50 * bool(sanitization_applied))
 
-    # Critical: Secrets found
-    if secrets_found:
-        score += 95
-
-    # High: PII found (30 points per type)
-    if pii_found:
-        score += len(pii_types) * 30
-
-    # Mitigation: Sanitization applied
-    if sanitization_applied:
-        score -= 50
-
-    # Ensure score stays within bounds
-    score = max(0, min(100, score))
-
-    return score
+    return 0 if score < 0 else 100 if score > 100 else score
 
 
 def smart_sanitize_with_gemini(text, pii_types):
@@ -394,10 +1531,10 @@ def smart_sanitize_with_gemini(text, pii_types):
     Returns:
         dict: Result with 'smart_sanitized_text', 'used_llm', and 'model_used'
     """
-    api_key = os.getenv("GEMINI_API_KEY")
+    api_key = _primary_key()
 
     if not api_key:
-        print("[EXECUTOR] No GEMINI_API_KEY found - cannot perform smart sanitization")
+        logger.debug("No GEMINI_API_KEY found - cannot perform smart sanitization")
         return {
             "smart_sanitized_text": text,
             "used_llm": False,
@@ -405,76 +1542,39 @@ def smart_sanitize_with_gemini(text, pii_types):
             "error": "API key not configured"
         }
 
-    # Configure Gemini API
-    genai.configure(api_key=api_key)
-
-    # Try multiple models in order of preference (prioritize models with available quota)
-    models_to_try = [
-        'gemini-2.5-flash-lite',      # Has quota available
-        'gemini-1.5-flash',            # Backup option
-        'gemini-1.5-flash-8b',         # Another backup
-        'gemini-flash-latest',         # Fallback
-        'gemini-2.5-flash',            # May be rate limited
-        'gemini-2.0-flash',            # May be rate limited
-        'gemini-pro-latest'            # Last resort
-    ]
+    key = (_text_key(text), frozenset(pii_types or ()))
+    cached = _SMART_CACHE.get(key)
+    if cached is not None:
+        return dict(cached)
 
     pii_description = ', '.join(pii_types) if pii_types else 'sensitive data'
 
-    for model_name in models_to_try:
-        try:
-            model = genai.GenerativeModel(model_name)
-
-            # Craft the context-aware sanitization prompt
-            prompt = f"""You are a privacy-preserving text rewriter.
-
-Your task:
-Rewrite the input text to REMOVE all personally identifiable information (PII) while preserving the meaning and making the text natural and useful.
-
-PII types detected: {pii_description}
-
-IMPORTANT RULES:
-1. Replace PII with NATURAL LANGUAGE equivalents, NOT placeholders like [REDACTED]
-2. Preserve the original meaning and context
-3. Make the text flow naturally as if it was written that way originally
-4. Use generic references (e.g., "the contact", "the customer", "the sales representative")
-5. Return ONLY the rewritten text, NO explanations or notes
-6. Do NOT use markdown formatting
-7. Keep the same tone and style as the original
-
-Examples of good transformations:
-- "Email sarah.johnson@acme.com" → "Email the sales contact"
-- "Contact John at 555-0123" → "Contact them by phone"
-- "John Smith (SSN: 123-45-6789)" → "Customer (identifier redacted)"
-- "Call me at 555-999-8888 or email test@example.com" → "You can reach them by phone or email"
-
-Input text:
-{text}
-
-Rewritten text:"""
-
-            # Call Gemini API
-            response = model.generate_content(prompt)
-            smart_sanitized = response.text.strip()
-
-            # Remove any markdown or formatting
-            smart_sanitized = re.sub(r'```.*?```', '', smart_sanitized, flags=re.DOTALL)
-            smart_sanitized = re.sub(r'[*_]', '', smart_sanitized)
-            smart_sanitized = smart_sanitized.strip()
-
-            print(f"[EXECUTOR] Smart sanitization successful using: {model_name}")
-            return {
-                "smart_sanitized_text": smart_sanitized,
-                "used_llm": True,
-                "model_used": model_name
-            }
-
-        except Exception as e:
-            print(f"[EXECUTOR] Model {model_name} failed for smart sanitization: {str(e)[:100]}")
-            continue
+    # Craft the context-aware sanitization prompt
+    prompt = "".join((
+        _SMART_PROMPT_PREFIX, pii_description, _SMART_PROMPT_RULES, text, _SMART_PROMPT_SUFFIX
+    ))
+
+    # Call Gemini API, racing fallback models
+    model_name, response_text = _call_gemini(prompt, purpose="smart sanitization")
+    if model_name is not None:
+        smart_sanitized = response_text.strip()
+
+        # Remove any markdown or formatting
+        smart_sanitized = _MD_CODE.sub('', smart_sanitized)
+        smart_sanitized = smart_sanitized.translate(_MD_STYLE)
+        smart_sanitized = smart_sanitized.strip()
+
+        logger.debug("Smart sanitization successful using: %s", model_name)
+        result = {
+            "smart_sanitized_text": smart_sanitized,
+            "used_llm": True,
+            "model_used": model_name
+        }
+        _SMART_CACHE.set(key, result, sys.getsizeof(smart_sanitized))
+        return dict(result)
 
     # All Gemini models failed - return original text
-    print("[EXECUTOR] All Gemini models failed for smart sanitization")
+    logger.warning("All Gemini models failed for smart sanitization")
     return {
         "smart_sanitized_text": text,
         "used_llm": False,
@@ -483,10 +1583,31 @@ Rewritten text:"""
     }
 
 
+def _static_explanation(secrets_found, pii_found, pii_types):
+    """Explanation used when Gemini is not configured, fails or times out."""
+    if secrets_found:
+        return "Content blocked because it contains secrets that could compromise security."
+    elif pii_found:
+        return f"Content sanitized to remove {', '.join(pii_types)} before AI processing."
+    else:
+        return "Content appears safe and can be processed without modifications."
+
+
 def generate_explanation(decision, risk_score, secrets_found, pii_found, pii_types, policy_refs):
     """
     AGENT 4: Decision Explanation Agent (LLM-powered)
 
+    Returns the explanation text of explain_decision(); see there.
+    """
+    return explain_decision(
+        decision, risk_score, secrets_found, pii_found, pii_types, policy_refs
+    )["explanation"]
+
+
+def explain_decision(decision, risk_score, secrets_found, pii_found, pii_types, policy_refs):
+    """
+    AGENT 4: Decision Explanation Agent (LLM-powered)
+
     Generates a plain-English explanation of why a decision was made.
     Uses Gemini to create clear, concise explanations.
 
@@ -505,72 +1626,170 @@ def generate_explanation(decision, risk_score, secrets_found, pii_found, pii_typ
         policy_refs (list): Applied policy references
 
     Returns:
-        str: Plain-English explanation
+        dict: Result with 'explanation' and 'used_llm' (False for the static
+        fallback explanations)
     """
-    api_key = os.getenv("GEMINI_API_KEY")
+    api_key = _primary_key()
 
     # Fallback to simple explanation if no API key
     if not api_key:
+        return {"explanation": _static_explanation(secrets_found, pii_found, pii_types),
+                "used_llm": False}
+
+    key = (decision, risk_score, secrets_found, pii_found,
+           tuple(pii_types or ()), tuple(p['id'] for p in policy_refs))
+    cached = _EXPLANATION_CACHE.get(key)
+    if cached is not None:
+        return {"explanation": cached, "used_llm": True}
+
+    try:
+        # Craft explanation prompt
+        prompt = (
+            _EXPLANATION_PROMPT_PREFIX
+            + f"Decision: {decision}\n"
+            + f"Risk Score: {risk_score}/100\n"
+            + f"Secrets Found: {secrets_found}\n"
+            + f"PII Found: {pii_found}\n"
+            + f"PII Types: {', '.join(pii_types) if pii_types else 'none'}\n"
+            + f"Policies: {', '.join([p['id'] for p in policy_refs])}"
+            + _EXPLANATION_PROMPT_SUFFIX
+        )
+
+        model_name, response_text = _call_gemini(prompt, EXPLANATION_MODELS, "explanation")
+        if model_name is not None:
+            explanation = response_text.strip()
+
+            # Remove any markdown or formatting that might have slipped through
+            explanation = explanation.translate(_MD_EXPLANATION)
+
+            _EXPLANATION_CACHE.set(key, explanation)
+            return {"explanation": explanation, "used_llm": True}
+
+        # Fallback if all models fail
+        return {"explanation": _static_explanation(secrets_found, pii_found, pii_types),
+                "used_llm": False}
+
+    except Exception:
+        # Ultimate fallback
         if secrets_found:
-            return f"Content blocked because it contains secrets that could compromise security."
+            explanation = "Content blocked due to security risks."
         elif pii_found:
-            return f"Content sanitized to remove {', '.join(pii_types)} before AI processing."
+            explanation = "Content sanitized for safety."
         else:
-            return "Content appears safe and can be processed without modifications."
+            explanation = "Content is safe to process."
+        return {"explanation": explanation, "used_llm": False}
+
+
+# BLOCK on a secret leaves nothing for the model to reason about: the wording
+# only depends on which pattern fired and which policies applied.
+_BLOCK_EXPLANATION_TEMPLATES = {
+    "OpenAI API Key": "an OpenAI API key",
+    "AWS Access Key": "an AWS access key",
+    "Private Key": "a private key",
+    "Generic API Key": "an API key",
+    "Bearer Token": "a bearer token",
+    "GitHub Token": "a GitHub token",
+    "Slack Token": "a Slack token",
+    "Google API Key": "a Google API key",
+    "Password in URL": "a password embedded in a URL",
+}
+_BLOCK_EXPLANATION = (
+    "Content blocked because it contains {secret}, and {policies} does not allow "
+    "credentials to leave company systems."
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _block_explanation(pattern, policy_ids):
+    return _BLOCK_EXPLANATION.format(
+        secret=_BLOCK_EXPLANATION_TEMPLATES.get(pattern, "a credential"),
+        policies=", ".join(policy_ids) or "policy",
+    )
+
+
+def render_block_explanation(pattern, policy_refs):
+    """
+    Explain a secrets BLOCK without calling Gemini.
 
-    try:
-        genai.configure(api_key=api_key)
+    Args:
+        pattern (str): Name of the secret pattern that matched
+        policy_refs (list): Applied policy references
 
-        # Try models in order
-        models_to_try = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-flash-latest']
+    Returns:
+        str: Plain-English explanation
+    """
+    return _block_explanation(pattern, tuple(p['id'] for p in policy_refs))
 
-        for model_name in models_to_try:
-            try:
-                model = genai.GenerativeModel(model_name)
 
-                # Craft explanation prompt
-                prompt = f"""Generate a 1-2 sentence plain-English explanation for this security decision.
+async def preflight(text):
+    """
+    Run the regex detection agents off the event loop.
 
-Decision: {decision}
-Risk Score: {risk_score}/100
-Secrets Found: {secrets_found}
-PII Found: {pii_found}
-PII Types: {', '.join(pii_types) if pii_types else 'none'}
-Policies: {', '.join([p['id'] for p in policy_refs])}
+    Both agents go through scan_text() in one worker thread: with RE2 that
+    is a single pattern-set pass for all secret and PII patterns, and the
+    regex engines hold the GIL, so two threads would not scan in parallel
+    anyway. The risk score is derived once both results are in.
 
-Rules:
-- Write in plain English
-- NO markdown, bullets, or formatting
-- Explain WHY this decision was made
-- Keep it to 1-2 sentences maximum
-- Focus on the user's benefit
+    Args:
+        text (str): The text to analyze
 
-Output only the explanation text:"""
+    Returns:
+        dict: 'secrets' and 'pii' detection results plus the unmitigated 'risk_score'
+    """
+    detection = await asyncio.to_thread(scan_text, text)
+    secrets_result, pii_result = detection["secrets"], detection["pii"]
+    risk_score = calculate_risk_score(
+        secrets_result["found"], pii_result["found"], pii_result["types"], False
+    )
+    return {
+        "secrets": secrets_result,
+        "pii": pii_result,
+        "risk_score": risk_score
+    }
 
-                response = model.generate_content(prompt)
-                explanation = response.text.strip()
 
-                # Remove any markdown or formatting that might have slipped through
-                explanation = re.sub(r'[*_#\-\[\]]', '', explanation)
+# Async entry points for the Gemini agents. The SDK's async client binds to
+# the first event loop it sees, so the blocking calls run in worker threads;
+# a timeout abandons the wait and returns the same fallback as an API failure.
 
-                return explanation
+async def sanitize_with_gemini_async(text, timeout=None):
+    """Async sanitize_with_gemini; falls back to regex masking on timeout."""
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(sanitize_with_gemini, text), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Gemini sanitization timed out after %ss - using regex fallback", timeout)
+        return {
+            "sanitized_text": regex_sanitize(text),
+            "used_llm": False,
+            "model_used": "regex_fallback"
+        }
 
-            except Exception:
-                continue
 
-        # Fallback if all models fail
-        if secrets_found:
-            return f"Content blocked because it contains secrets that could compromise security."
-        elif pii_found:
-            return f"Content sanitized to remove {', '.join(pii_types)} before AI processing."
-        else:
-            return "Content appears safe and can be processed without modifications."
+async def smart_sanitize_with_gemini_async(text, pii_types, timeout=None):
+    """Async smart_sanitize_with_gemini; returns the original text on timeout."""
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(smart_sanitize_with_gemini, text, pii_types), timeout
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Smart sanitization timed out after %ss", timeout)
+        return {
+            "smart_sanitized_text": text,
+            "used_llm": False,
+            "model_used": "failed",
+            "error": "Timed out"
+        }
 
-    except Exception:
-        # Ultimate fallback
-        if secrets_found:
-            return "Content blocked due to security risks."
-        elif pii_found:
-            return "Content sanitized for safety."
-        else:
-            return "Content is safe to process."
+
+async def explain_decision_async(decision, risk_score, secrets_found, pii_found,
+                                 pii_types, policy_refs, timeout=None):
+    """Async explain_decision; uses the static explanation on timeout."""
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(explain_decision, decision, risk_score, secrets_found,
+                              pii_found, pii_types, policy_refs),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        return {"explanation": _static_explanation(secrets_found, pii_found, pii_types),
+                "used_llm": False}
@@ -15,17 +15,40 @@ Architecture:
 
 Supported file types:
 - Images (.png, .jpg, .jpeg, .webp): OCR with pytesseract
-- PDFs (.pdf): Text extraction with PyPDF2
+- PDFs (.pdf): Text extraction with pypdfium2 (PyPDF2 fallback)
 - Word Documents (.docx): python-docx
 - Excel Spreadsheets (.xlsx): openpyxl
 - PowerPoint (.pptx): python-pptx
 """
 
+import functools
+import logging
+import mmap
 import os
 import re
+import sys
+import threading
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from stat import S_ISREG
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+
+logger = logging.getLogger(__name__)
+
+# Decoded-size cap for images: Pillow refuses anything over twice this, so
+# a decompression-bomb upload cannot exhaust a worker's memory
+MAX_IMAGE_PIXELS = 50_000_000
+
+try:
+    from PIL import Image as _PILImage
+    _PILImage.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+except ImportError:
+    pass
+
 # Image processing
 try:
     import pytesseract
@@ -49,13 +72,88 @@ try:
 except ImportError:
     PYTESSERACT_AVAILABLE = False
 
-# PDF processing
+# In-process Tesseract bindings: one engine is loaded once and reused, instead
+# of pytesseract spawning a tesseract process (and reloading models) per image
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+_TESS_API = None
+_TESS_LOCK = threading.Lock()
+
+# OCR input limits: Tesseract's cost scales with pixel count, and text stays
+# legible well below phone-camera resolutions
+OCR_MAX_SIDE = 2000
+OCR_MAX_DPI = 300
+# LSTM engine, single uniform block: preprocessed images need no layout analysis
+TESSERACT_CONFIG = "--oem 1 --psm 6"
+
+# PDF processing: pdfium's native text layer is much faster than PyPDF2's
+# pure-Python parser, which stays as the fallback
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
 try:
     from PyPDF2 import PdfReader
     PYPDF2_AVAILABLE = True
 except ImportError:
     PYPDF2_AVAILABLE = False
 
+
+def _recover_flate(data: bytes) -> bytes:
+    """
+    Inflate as much of a damaged Flate stream as possible, in bulk.
+
+    PyPDF2's recovery path feeds the stream to zlib one byte at a time and
+    grows its result by concatenation, so one large damaged image can spend
+    minutes there. Here the stream is fed in blocks; only the block holding
+    the damage is replayed byte by byte from a checkpoint, which returns the
+    same bytes PyPDF2's loop would (inflate cannot continue past an error).
+    """
+    inflater = zlib.decompressobj(zlib.MAX_WBITS | 32)
+    output = []
+    block = 64 * 1024
+    for start in range(0, len(data), block):
+        chunk = data[start:start + block]
+        checkpoint = inflater.copy()
+        try:
+            output.append(inflater.decompress(chunk))
+            continue
+        except zlib.error:
+            inflater = checkpoint
+        for index in range(len(chunk)):
+            try:
+                output.append(inflater.decompress(chunk[index:index + 1]))
+            except zlib.error:
+                return b"".join(output)
+    return b"".join(output)
+
+
+def _flate_decompress(data: bytes) -> bytes:
+    """Drop-in for PyPDF2.filters.decompress with a bulk recovery path."""
+    try:
+        return zlib.decompress(data)
+    except zlib.error:
+        return _recover_flate(data)
+
+
+def _patch_pypdf_flate():
+    """Route PyPDF2's FlateDecode through _flate_decompress (done once at import)."""
+    import PyPDF2.filters
+    PyPDF2.filters.decompress = _flate_decompress
+
+
+if PYPDF2_AVAILABLE:
+    _patch_pypdf_flate()
+
+# "pdfium" or "pypdf2"; a backend that is not installed falls back to the other
+PREFERRED_PDF_BACKEND = os.getenv("PREFERRED_PDF_BACKEND", "pdfium").lower()
+
 # Office document processing
 try:
     from docx import Document
@@ -65,6 +163,11 @@ except ImportError:
 
 try:
     from openpyxl import load_workbook
+    from openpyxl.reader.excel import ExcelReader
+    from openpyxl.styles.stylesheet import apply_stylesheet
+    from openpyxl.utils.cell import column_index_from_string, range_boundaries
+    from openpyxl.utils.datetime import from_excel, from_ISO8601
+    from openpyxl.xml.constants import SHARED_STRINGS
     OPENPYXL_AVAILABLE = True
 except ImportError:
     OPENPYXL_AVAILABLE = False
@@ -77,17 +180,78 @@ except ImportError:
 
 # Import existing detection and sanitization functions
 from executor import (
+    ResultCache,
+    scan_text,
     detect_secrets,
-    detect_pii,
     sanitize_with_gemini,
     calculate_risk_score,
     generate_explanation,
+    render_block_explanation,
     evaluate_policy,
     regex_sanitize
 )
-from memory import log_decision
-import uuid
-from datetime import datetime
+from memory import log_decision, new_audit_id, utc_timestamp
+
+
+# Text-likelihood gate for the Gemini Vision upload: an image whose reduced
+# grayscale copy has fewer edge pixels than this is taken to hold no text.
+# Kept deliberately low, since a skipped image is never checked for secrets
+_TEXT_EDGE_SIDE = 1024
+_TEXT_EDGE_LEVEL = 64
+_TEXT_EDGE_MIN_PIXELS = 16
+_UPLOAD_JPEG_QUALITY = 75
+
+# Try multiple models with fallback (to handle rate limits)
+GEMINI_VISION_MODELS = (
+    'gemini-2.5-flash-lite',      # Has quota available
+    'gemini-1.5-flash',            # Backup option
+    'gemini-1.5-flash-8b',         # Another backup
+    'gemini-2.0-flash-exp',        # Original (might be rate limited)
+)
+
+# Images per multimodal request in extract_text_from_images_with_gemini()
+GEMINI_OCR_BATCH_SIZE = 8
+
+_GEMINI_OCR_BATCH_PROMPT = """Extract ALL text from each of the {count} images below, numbered 1 to {count} in order.
+For every image, output a header line ===IMG n=== (n is the image number) followed by ONLY that image's text.
+If an image has no text, write NO_TEXT_FOUND under its header. Output nothing else."""
+_GEMINI_OCR_BATCH_HEADER = re.compile(r'^===IMG (\d+)===[ \t]*$', re.MULTILINE)
+
+
+def _likely_has_text(image) -> bool:
+    """Cheap local check for any text-like edges, run before any upload."""
+    from PIL import ImageFilter
+
+    gray = image.convert('L')
+    gray.thumbnail((_TEXT_EDGE_SIDE, _TEXT_EDGE_SIDE))
+    if gray.width < 3 or gray.height < 3:
+        return True
+
+    # FIND_EDGES leaves the 1px border unfiltered, so it is cropped away
+    edges = gray.filter(ImageFilter.FIND_EDGES).crop((1, 1, gray.width - 1, gray.height - 1))
+    return sum(edges.histogram()[_TEXT_EDGE_LEVEL:]) >= _TEXT_EDGE_MIN_PIXELS
+
+
+def _flatten_image(image):
+    """RGB copy of an image, with any transparency composited onto white."""
+    from PIL import Image as PILImage
+
+    if image.mode not in ('RGBA', 'LA', 'PA') and 'transparency' not in image.info:
+        return image.convert('RGB')
+
+    rgba = image.convert('RGBA')
+    flat = PILImage.new('RGB', rgba.size, (255, 255, 255))
+    flat.paste(rgba, mask=rgba.getchannel('A'))
+    return flat
+
+
+def _image_upload_part(image) -> Dict[str, any]:
+    """Image as a JPEG inline-data part, several times smaller than the source PNG."""
+    import io
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=_UPLOAD_JPEG_QUALITY)
+    return {"mime_type": "image/jpeg", "data": buffer.getvalue()}
 
 
 def extract_text_from_image_with_gemini(image_path: str) -> Dict[str, any]:
@@ -105,7 +269,7 @@ def extract_text_from_image_with_gemini(image_path: str) -> Dict[str, any]:
         image_path (str): Path to the image file
 
     Returns:
-        dict: Extraction result with 'success', 'text', and optional 'error'
+        dict: Extraction result with 'success', 'text' (already stripped), and optional 'error'
     """
     try:
         import google.generativeai as genai
@@ -124,57 +288,213 @@ def extract_text_from_image_with_gemini(image_path: str) -> Dict[str, any]:
         # Configure Gemini
         genai.configure(api_key=api_key)
 
-        # Open image
-        image = PILImage.open(image_path)
-
-        # Try multiple models with fallback (to handle rate limits)
-        models_to_try = [
-            'gemini-2.5-flash-lite',      # Has quota available
-            'gemini-1.5-flash',            # Backup option
-            'gemini-1.5-flash-8b',         # Another backup
-            'gemini-2.0-flash-exp',        # Original (might be rate limited)
-        ]
+        # Open image; skip the round trip when there is nothing text-like to read
+        with PILImage.open(image_path) as source:
+            image = _flatten_image(source)
+        if not _likely_has_text(image):
+            return _gemini_ocr_result("")
+        image_part = _image_upload_part(image)
 
         prompt = """Extract ALL text from this image. Return ONLY the extracted text, nothing else.
 If there is no text in the image, respond with: NO_TEXT_FOUND"""
 
         last_error = None
-        for model_name in models_to_try:
+        for model_name in GEMINI_VISION_MODELS:
             try:
-                print(f"[OCR] Trying Gemini model: {model_name}")
+                logger.debug("Trying Gemini model: %s", model_name)
                 model = genai.GenerativeModel(model_name)
-                response = model.generate_content([prompt, image])
+                response = model.generate_content([prompt, image_part])
                 extracted_text = response.text.strip()
-                print(f"[OCR] Successfully used model: {model_name}")
+                logger.debug("Successfully used Gemini model: %s", model_name)
                 break  # Success! Exit the loop
             except Exception as e:
                 last_error = e
-                print(f"[OCR] Model {model_name} failed: {str(e)}, trying next...")
+                logger.debug("Model %s failed: %s, trying next...", model_name, e)
                 continue
         else:
             # All models failed
             raise Exception(f"All Gemini models failed. Last error: {last_error}")
 
-        if extracted_text == "NO_TEXT_FOUND" or not extracted_text:
-            return {
-                "success": True,
-                "text": "",
-                "warning": "No text detected in image",
-                "method": "gemini_vision"
-            }
+        return _gemini_ocr_result(extracted_text)
+
+    except Exception as e:
+        return {
+            "success": False,
+            "text": "",
+            "error": f"Gemini Vision OCR failed: {str(e)}"
+        }
 
+
+def _gemini_ocr_result(text: str) -> Dict[str, any]:
+    """Result dict for text read back from Gemini Vision."""
+    if text == "NO_TEXT_FOUND" or not text:
         return {
             "success": True,
-            "text": extracted_text,
+            "text": "",
+            "warning": "No text detected in image",
             "method": "gemini_vision"
         }
 
-    except Exception as e:
-        return {
+    return {
+        "success": True,
+        "text": text,
+        "method": "gemini_vision"
+    }
+
+
+def extract_text_from_images_with_gemini(image_paths: List[str]) -> List[Dict[str, any]]:
+    """
+    Extract text from several images, GEMINI_OCR_BATCH_SIZE per Gemini request.
+
+    Batching pays the per-request latency once per batch instead of once per
+    image. Each batch asks for a ===IMG n=== header before every image's text;
+    an image missing from the reply is retried on its own with
+    extract_text_from_image_with_gemini().
+
+    Args:
+        image_paths (list): Paths of the image files
+
+    Returns:
+        list: One extraction result per path, in input order, in the format
+        of extract_text_from_image_with_gemini()
+    """
+    import google.generativeai as genai
+    from PIL import Image as PILImage
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return [{
             "success": False,
             "text": "",
-            "error": f"Gemini Vision OCR failed: {str(e)}"
-        }
+            "error": "GEMINI_API_KEY not set. Cannot extract text from image."
+        } for _ in image_paths]
+
+    genai.configure(api_key=api_key)
+
+    results: List[Optional[Dict[str, any]]] = [None] * len(image_paths)
+    pending = []  # (index, upload part) of images worth sending
+    for index, image_path in enumerate(image_paths):
+        try:
+            with PILImage.open(image_path) as source:
+                image = _flatten_image(source)
+        except Exception as e:
+            results[index] = {
+                "success": False,
+                "text": "",
+                "error": f"Gemini Vision OCR failed: {str(e)}"
+            }
+            continue
+        if _likely_has_text(image):
+            pending.append((index, _image_upload_part(image)))
+        else:
+            results[index] = _gemini_ocr_result("")
+
+    for start in range(0, len(pending), GEMINI_OCR_BATCH_SIZE):
+        batch = pending[start:start + GEMINI_OCR_BATCH_SIZE]
+        contents = [_GEMINI_OCR_BATCH_PROMPT.format(count=len(batch))]
+        contents.extend(part for _, part in batch)
+
+        last_error = None
+        for model_name in GEMINI_VISION_MODELS:
+            try:
+                logger.debug("Trying Gemini model: %s (%d images)", model_name, len(batch))
+                reply = genai.GenerativeModel(model_name).generate_content(contents).text
+                logger.debug("Successfully used Gemini model: %s", model_name)
+                break
+            except Exception as e:
+                last_error = e
+                logger.debug("Model %s failed: %s, trying next...", model_name, e)
+        else:
+            for index, _ in batch:
+                results[index] = {
+                    "success": False,
+                    "text": "",
+                    "error": f"Gemini Vision OCR failed: All Gemini models failed. Last error: {last_error}"
+                }
+            continue
+
+        # re.split with a capture group gives [preamble, n1, text1, n2, text2, ...]
+        pieces = _GEMINI_OCR_BATCH_HEADER.split(reply)
+        texts = {}
+        for number, text in zip(pieces[1::2], pieces[2::2]):
+            texts.setdefault(int(number), text.strip())
+
+        for number, (index, _) in enumerate(batch, 1):
+            if number in texts:
+                results[index] = _gemini_ocr_result(texts[number])
+            else:
+                results[index] = extract_text_from_image_with_gemini(image_paths[index])
+
+    return results
+
+
+def _tesserocr_image_to_string(image) -> Optional[str]:
+    """
+    OCR an image on the shared tesserocr engine, created on first use.
+
+    Returns None when the engine cannot start (e.g. no tessdata), after which
+    callers stay on pytesseract.
+    """
+    global _TESS_API, TESSEROCR_AVAILABLE
+
+    with _TESS_LOCK:
+        if _TESS_API is None:
+            try:
+                _TESS_API = tesserocr.PyTessBaseAPI(
+                    lang='eng', psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.LSTM_ONLY
+                )
+            except RuntimeError:
+                TESSEROCR_AVAILABLE = False
+                return None
+        _TESS_API.SetImage(image)
+        return _TESS_API.GetUTF8Text()
+
+
+def _otsu_threshold(histogram: List[int]) -> int:
+    """Otsu's threshold for a 256-bin grayscale histogram."""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+
+    best_level, best_variance = 0, -1.0
+    background = weighted_background = 0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def _prepare_for_ocr(image):
+    """
+    Grayscale, downscale and binarize an image for Tesseract.
+
+    Images are shrunk to at most OCR_MAX_SIDE pixels on the long side and
+    OCR_MAX_DPI, then thresholded with Otsu's method.
+    """
+    from PIL import Image
+
+    image = image.convert('L')
+
+    width, height = image.size
+    scale = OCR_MAX_SIDE / max(width, height)
+    dpi = image.info.get('dpi')
+    if dpi and dpi[0]:
+        scale = min(scale, OCR_MAX_DPI / float(dpi[0]))
+    if scale < 1:
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        image = image.resize(size, Image.BILINEAR)
+
+    threshold = _otsu_threshold(image.histogram())
+    return image.point(lambda level: 255 if level > threshold else 0)
 
 
 def extract_text_locally_from_image(image_path: str) -> Dict[str, any]:
@@ -190,20 +510,27 @@ def extract_text_locally_from_image(image_path: str) -> Dict[str, any]:
         image_path (str): Path to the image file
 
     Returns:
-        dict: Extraction result with 'success', 'text', and optional 'error'
+        dict: Extraction result with 'success', 'text' (already stripped), and optional 'error'
     """
     # SECURITY: Only use local Tesseract OCR
     # We do NOT send raw images to external APIs before checking for secrets
-    if PYTESSERACT_AVAILABLE:
+    if TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE:
         try:
             from PIL import Image
             # Open and process image
-            image = Image.open(image_path)
-
-            # Extract text using OCR
-            text = pytesseract.image_to_string(image)
-
-            if not text or not text.strip():
+            # The preprocessed copy is decoded in full, so the file closes right away
+            with Image.open(image_path) as source:
+                image = _prepare_for_ocr(source)
+
+            # Extract text using OCR, in-process when the bindings work
+            text = _tesserocr_image_to_string(image) if TESSEROCR_AVAILABLE else None
+            if text is None:
+                if not PYTESSERACT_AVAILABLE:
+                    raise RuntimeError("tesserocr could not load Tesseract language data")
+                text = pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+
+            text = text.strip() if text else ""
+            if not text:
                 return {
                     "success": True,
                     "text": "",
@@ -213,7 +540,7 @@ def extract_text_locally_from_image(image_path: str) -> Dict[str, any]:
 
             return {
                 "success": True,
-                "text": text.strip(),
+                "text": text,
                 "method": "tesseract_local"
             }
 
@@ -236,36 +563,84 @@ def extract_text_locally_from_image(image_path: str) -> Dict[str, any]:
     }
 
 
-def extract_text_locally_from_pdf(pdf_path: str) -> Dict[str, any]:
+def _pdf_backend() -> Optional[str]:
+    """Name of the installed PDF backend to use, honouring PREFERRED_PDF_BACKEND."""
+    if PDFIUM_AVAILABLE and (PREFERRED_PDF_BACKEND != "pypdf2" or not PYPDF2_AVAILABLE):
+        return "pypdfium2"
+    return "PyPDF2" if PYPDF2_AVAILABLE else None
+
+
+def iter_pdf_pages(pdf_path: str):
     """
-    Extract text from PDF using PyPDF2 (LOCAL, no API calls).
+    Yield (page number, text) for each PDF page that has text, decoding lazily.
 
     Args:
         pdf_path (str): Path to the PDF file
 
+    Yields:
+        tuple: 1-based page number and the page's extracted text
+    """
+    if _pdf_backend() == "pypdfium2":
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            for index in range(len(pdf)):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_range().replace("\r\n", "\n")
+                textpage.close()
+                page.close()
+                if page_text:
+                    yield index + 1, page_text
+        finally:
+            pdf.close()
+        return
+
+    reader = PdfReader(pdf_path)
+    for page_num, page in enumerate(reader.pages, start=1):
+        page_text = page.extract_text()
+        if page_text:
+            yield page_num, page_text
+
+
+def extract_text_locally_from_pdf(pdf_path: str, stop_at_secret: bool = False) -> Dict[str, any]:
+    """
+    Extract text from PDF using pypdfium2 or PyPDF2 (LOCAL, no API calls).
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        stop_at_secret (bool): Stop decoding after the first page holding a
+            secret; the text then ends with that page, which is enough to BLOCK
+
     Returns:
-        dict: Extraction result with 'success', 'text', and optional 'error'
+        dict: Extraction result with 'success', 'text' (already stripped), and optional 'error'
     """
-    if not PYPDF2_AVAILABLE:
+    if _pdf_backend() is None:
         return {
             "success": False,
             "text": "",
-            "error": "PyPDF2 not installed. Run: pip install PyPDF2"
+            "error": "No PDF library installed. Run: pip install pypdfium2"
         }
 
     try:
-        reader = PdfReader(pdf_path)
-
-        # Extract text from all pages
+        # Extract text page by page
         text_parts = []
-        for page_num, page in enumerate(reader.pages):
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(f"[Page {page_num + 1}]\n{page_text}")
+        stopped_at = None
+        for page_num, page_text in iter_pdf_pages(pdf_path):
+            text_parts.append(f"[Page {page_num}]\n{page_text}")
+            if stop_at_secret and detect_secrets(page_text)["found"]:
+                stopped_at = page_num
+                break
 
-        full_text = "\n\n".join(text_parts)
+        full_text = "\n\n".join(text_parts).strip()
 
-        if not full_text.strip():
+        if stopped_at is not None:
+            return {
+                "success": True,
+                "text": full_text,
+                "warning": f"Secret found on page {stopped_at}; remaining pages were not extracted"
+            }
+
+        if not full_text:
             return {
                 "success": True,
                 "text": "",
@@ -274,7 +649,7 @@ def extract_text_locally_from_pdf(pdf_path: str) -> Dict[str, any]:
 
         return {
             "success": True,
-            "text": full_text.strip()
+            "text": full_text
         }
 
     except Exception as e:
@@ -287,41 +662,52 @@ def extract_text_locally_from_pdf(pdf_path: str) -> Dict[str, any]:
 
 def extract_text_locally_from_docx(docx_path: str) -> Dict[str, any]:
     """
-    Extract text from Word document using python-docx (LOCAL, no API calls).
+    Extract text from Word document from its XML, python-docx as fallback (LOCAL, no API calls).
 
     Args:
         docx_path (str): Path to the .docx file
 
     Returns:
-        dict: Extraction result with 'success', 'text', and optional 'error'
+        dict: Extraction result with 'success', 'text' (already stripped), and optional 'error'
     """
-    if not DOCX_AVAILABLE:
-        return {
-            "success": False,
-            "text": "",
-            "error": "python-docx not installed. Run: pip install python-docx"
-        }
-
     try:
-        doc = Document(docx_path)
+        # Stream paragraph and table text straight from the document XML;
+        # layouts the streaming path does not cover go through python-docx
+        try:
+            streamed = _stream_docx_text(docx_path)
+        except Exception:
+            streamed = None
+
+        if streamed is not None:
+            paragraphs, table_texts = streamed
+        elif not DOCX_AVAILABLE:
+            return {
+                "success": False,
+                "text": "",
+                "error": "python-docx not installed. Run: pip install python-docx"
+            }
+        else:
+            doc = Document(docx_path)
 
-        # Extract text from paragraphs
-        paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+            # Extract text from paragraphs
+            paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
 
-        # Extract text from tables
-        table_texts = []
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = " | ".join([cell.text for cell in row.cells])
-                if row_text.strip():
-                    table_texts.append(row_text)
+            # Extract text from tables
+            table_texts = []
+            for table in doc.tables:
+                for row in table.rows:
+                    row_text = " | ".join([cell.text for cell in row.cells])
+                    if row_text.strip():
+                        table_texts.append(row_text)
 
-        # Combine all text
-        all_text = "\n".join(paragraphs)
+        # Combine all text in a single join
+        parts = paragraphs
         if table_texts:
-            all_text += "\n\n[Tables]\n" + "\n".join(table_texts)
+            parts.append("\n[Tables]")
+            parts.extend(table_texts)
+        all_text = "\n".join(parts).strip()
 
-        if not all_text.strip():
+        if not all_text:
             return {
                 "success": True,
                 "text": "",
@@ -330,7 +716,7 @@ def extract_text_locally_from_docx(docx_path: str) -> Dict[str, any]:
 
         return {
             "success": True,
-            "text": all_text.strip()
+            "text": all_text
         }
 
     except Exception as e:
@@ -341,6 +727,140 @@ def extract_text_locally_from_docx(docx_path: str) -> Dict[str, any]:
         }
 
 
+_DOCX_TAG = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}%s"
+_DOCX_MAIN_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_PACKAGE_RELS_TAG = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+_CONTENT_TYPES_OVERRIDE = "{http://schemas.openxmlformats.org/package/2006/content-types}Override"
+
+_W_P, _W_R, _W_T, _W_TBL, _W_TR, _W_TC = (_DOCX_TAG % tag for tag in ("p", "r", "t", "tbl", "tr", "tc"))
+_W_HYPERLINK, _W_BODY, _W_BR, _W_TYPE = (_DOCX_TAG % tag for tag in ("hyperlink", "body", "br", "type"))
+# Run content with a fixed text equivalent, as python-docx renders it
+_W_RUN_SYMBOLS = {
+    _DOCX_TAG % "tab": "\t",
+    _DOCX_TAG % "ptab": "\t",
+    _DOCX_TAG % "cr": "\n",
+    _DOCX_TAG % "noBreakHyphen": "-",
+}
+
+
+def _docx_paragraph_text(paragraph) -> str:
+    """Paragraph.text of python-docx: its runs and hyperlink runs, rendered in order."""
+    pieces = []
+    for child in paragraph:
+        if child.tag == _W_R:
+            runs = (child,)
+        elif child.tag == _W_HYPERLINK:
+            runs = child.iterfind(_W_R)
+        else:
+            continue
+        for run in runs:
+            for item in run:
+                tag = item.tag
+                if tag == _W_T:
+                    pieces.append(item.text or "")
+                elif tag == _W_BR:
+                    if item.get(_W_TYPE, "textWrapping") == "textWrapping":
+                        pieces.append("\n")
+                elif tag in _W_RUN_SYMBOLS:
+                    pieces.append(_W_RUN_SYMBOLS[tag])
+    return "".join(pieces)
+
+
+def _docx_table_rows(table) -> Optional[List[str]]:
+    """
+    Row texts of a body table, or None for layouts with merged or spanned cells.
+
+    python-docx repeats merged cells across the layout grid; only plain grids,
+    where every row holds one cell per grid column, are rendered here.
+    """
+    grid = table.find(_DOCX_TAG % "tblGrid")
+    column_count = len(grid.findall(_DOCX_TAG % "gridCol")) if grid is not None else 0
+
+    rows = []
+    for row in table.iterfind(_W_TR):
+        cells = row.findall(_W_TC)
+        if len(cells) != column_count:
+            return None
+        texts = []
+        for cell in cells:
+            properties = cell.find(_DOCX_TAG % "tcPr")
+            if properties is not None:
+                span = properties.find(_DOCX_TAG % "gridSpan")
+                if properties.find(_DOCX_TAG % "vMerge") is not None or (
+                        span is not None and span.get(_DOCX_TAG % "val", "1") != "1"):
+                    return None
+            texts.append("\n".join(_docx_paragraph_text(p) for p in cell.iterfind(_W_P)))
+        row_text = " | ".join(texts)
+        if row_text.strip():
+            rows.append(row_text)
+    return rows
+
+
+def _docx_main_part(archive: zipfile.ZipFile) -> Optional[str]:
+    """Zip member name of the package's main document part, if it is a Word document."""
+    with archive.open("_rels/.rels") as source:
+        targets = [
+            rel.get("Target") for rel in ET.parse(source).getroot().iter(_PACKAGE_RELS_TAG)
+            if rel.get("Type") == _OFFICE_DOCUMENT_REL
+        ]
+    if len(targets) != 1:
+        return None
+    part_name = "/" + targets[0].lstrip("/")
+
+    with archive.open("[Content_Types].xml") as source:
+        for override in ET.parse(source).getroot().iter(_CONTENT_TYPES_OVERRIDE):
+            if override.get("PartName", "").lower() == part_name.lower():
+                return part_name[1:] if override.get("ContentType") == _DOCX_MAIN_TYPE else None
+    return None
+
+
+def _stream_docx_text(docx_path: str) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    (paragraph texts, table row texts) of a document, streamed from its XML.
+
+    Matches what extract_text_locally_from_docx() builds from python-docx's
+    doc.paragraphs and doc.tables: top-level blocks only, non-blank entries.
+    Each block is rendered once complete and then dropped from the tree.
+    Returns None where python-docx is needed (merged table cells, packages
+    that are not plain Word documents).
+    """
+    with zipfile.ZipFile(docx_path) as archive:
+        part = _docx_main_part(archive)
+        if part is None:
+            return None
+
+        paragraphs, table_texts = [], []
+        depth = 0
+        body = None
+        with archive.open(part) as source:
+            for event, element in ET.iterparse(source, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and element.tag == _W_BODY:
+                        body = element
+                    continue
+
+                depth -= 1
+                if depth != 2 or body is None:
+                    continue
+                if element.tag == _W_P:
+                    text = _docx_paragraph_text(element)
+                    if text.strip():
+                        paragraphs.append(text)
+                elif element.tag == _W_TBL:
+                    rows = _docx_table_rows(element)
+                    if rows is None:
+                        return None
+                    table_texts.extend(rows)
+                # Blocks are done with once rendered
+                body.clear()
+
+        if body is None:
+            return None
+        return paragraphs, table_texts
+
+
 def extract_text_locally_from_xlsx(xlsx_path: str) -> Dict[str, any]:
     """
     Extract text from Excel spreadsheet using openpyxl (LOCAL, no API calls).
@@ -349,7 +869,7 @@ def extract_text_locally_from_xlsx(xlsx_path: str) -> Dict[str, any]:
         xlsx_path (str): Path to the .xlsx file
 
     Returns:
-        dict: Extraction result with 'success', 'text', and optional 'error'
+        dict: Extraction result with 'success', 'text' (already stripped), and optional 'error'
     """
     if not OPENPYXL_AVAILABLE:
         return {
@@ -359,23 +879,31 @@ def extract_text_locally_from_xlsx(xlsx_path: str) -> Dict[str, any]:
         }
 
     try:
-        workbook = load_workbook(xlsx_path, read_only=True, data_only=True)
+        # Stream cell text straight from the sheet XML; anything the streaming
+        # path rejects or fails on goes through openpyxl's own reader
+        try:
+            all_text = _stream_xlsx_lines(xlsx_path)
+        except Exception:
+            all_text = None
 
-        all_text = []
+        if all_text is None:
+            workbook = load_workbook(xlsx_path, read_only=True, data_only=True)
 
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
-            all_text.append(f"[Sheet: {sheet_name}]")
+            all_text = []
 
-            # Extract cell values
-            for row in sheet.iter_rows(values_only=True):
-                row_text = " | ".join([str(cell) if cell is not None else "" for cell in row])
-                if row_text.strip():
-                    all_text.append(row_text)
+            for sheet_name in workbook.sheetnames:
+                sheet = workbook[sheet_name]
+                all_text.append(f"[Sheet: {sheet_name}]")
 
-        full_text = "\n".join(all_text)
+                # Extract cell values
+                for row in sheet.iter_rows(values_only=True):
+                    row_text = " | ".join([str(cell) if cell is not None else "" for cell in row])
+                    if row_text.strip():
+                        all_text.append(row_text)
 
-        if not full_text.strip():
+        full_text = "\n".join(all_text).strip()
+
+        if not full_text:
             return {
                 "success": True,
                 "text": "",
@@ -384,7 +912,7 @@ def extract_text_locally_from_xlsx(xlsx_path: str) -> Dict[str, any]:
 
         return {
             "success": True,
-            "text": full_text.strip()
+            "text": full_text
         }
 
     except Exception as e:
@@ -395,6 +923,167 @@ def extract_text_locally_from_xlsx(xlsx_path: str) -> Dict[str, any]:
         }
 
 
+_XLSX_TAG = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}%s"
+_XLSX_COLUMN = re.compile(r"[A-Za-z]+")
+
+
+def _xlsx_plain_text(node) -> str:
+    """Plain text of a string item (<si>/<is>): its <t> plus rich-text runs, no phonetics."""
+    snippets = []
+    plain = node.findtext(_XLSX_TAG % "t")
+    if plain is not None:
+        snippets.append(plain)
+    for run in node.iterfind(_XLSX_TAG % "r"):
+        text = run.findtext(_XLSX_TAG % "t")
+        if text is not None:
+            snippets.append(text)
+    return "".join(snippets)
+
+
+def _xlsx_shared_strings(reader) -> List[str]:
+    """Shared string table, read the way openpyxl's read_string_table does."""
+    part = reader.package.find(SHARED_STRINGS)
+    if part is None:
+        return []
+
+    strings = []
+    item_tag = _XLSX_TAG % "si"
+    with reader.archive.open(part.PartName[1:]) as source:
+        for _, element in ET.iterparse(source):
+            if element.tag == item_tag:
+                strings.append(_xlsx_plain_text(element).replace('x005F_', ''))
+                element.clear()
+    return strings
+
+
+def _xlsx_cell_text(element, shared_strings, date_formats, epoch) -> str:
+    """
+    Cell value as openpyxl's read-only, data_only reader would give it,
+    rendered with str(). Like that reader, duration formats are read as dates.
+    """
+    data_type = element.get('t', 'n')
+
+    if data_type == "inlineStr":
+        child = element.find(_XLSX_TAG % "is")
+        return _xlsx_plain_text(child) if child is not None else ""
+
+    value = element.findtext(_XLSX_TAG % "v", None) or None
+    if value is None:
+        return ""
+    if data_type == 'n':
+        number = float(value) if "." in value or "E" in value or "e" in value else int(value)
+        style_id = int(element.get('s', 0) or 0)
+        if style_id in date_formats:
+            try:
+                return str(from_excel(number, epoch))
+            except (OverflowError, ValueError):
+                return "#VALUE!"
+        return str(number)
+    if data_type == 's':
+        return shared_strings[int(value)]
+    if data_type == 'b':
+        return str(bool(int(value)))
+    if data_type == 'd':
+        return str(from_ISO8601(value))
+    return value
+
+
+def _iter_sheet_rows(source, shared_strings, date_formats, epoch):
+    """
+    Yield each row of a worksheet XML stream as a list of cell strings.
+
+    Cells are rendered as they stream past, without openpyxl's per-cell dicts
+    and value tuples. Row and column padding follows
+    ReadOnlyWorksheet.iter_rows(values_only=True) exactly, including the
+    <dimension> bounds, which precede <sheetData> when present.
+    """
+    row_tag, cell_tag, dimension_tag = _XLSX_TAG % "row", _XLSX_TAG % "c", _XLSX_TAG % "dimension"
+    max_col = max_row = None
+    empty_row = []
+
+    counter = 1
+    idx = 0
+    for _, element in ET.iterparse(source):
+        if element.tag == dimension_tag and idx == 0:
+            _, _, max_col, max_row = range_boundaries(element.get("ref"))
+            empty_row = [""] * max_col if max_col is not None else []
+            continue
+        if element.tag != row_tag:
+            continue
+
+        row_number = element.get('r')
+        idx = int(float(row_number)) if row_number is not None else idx + 1
+        if max_row is not None and idx > max_row:
+            break
+
+        # some rows are missing
+        while counter < idx:
+            counter += 1
+            yield empty_row
+
+        if counter <= idx:
+            counter += 1
+            cells = []
+            column = 0
+            for cell in element.iter(cell_tag):
+                coordinate = cell.get('r')
+                if coordinate:
+                    column = column_index_from_string(_XLSX_COLUMN.match(coordinate).group())
+                else:
+                    column += 1
+                cells.append((column, _xlsx_cell_text(cell, shared_strings, date_formats, epoch)))
+
+            if cells or max_col:
+                width = max_col or cells[-1][0]
+                row = [""] * width
+                for column, text in cells:
+                    if 1 <= column <= width:
+                        row[column - 1] = text
+                yield row
+            else:
+                yield []
+        element.clear()
+
+    if max_row is not None and max_row < idx:
+        for _ in range(counter, max_row + 1):
+            yield empty_row
+
+
+def _stream_xlsx_lines(xlsx_path: str) -> Optional[List[str]]:
+    """
+    Text lines of a workbook, streamed sheet by sheet from the package XML.
+
+    Workbook structure and styles still come from openpyxl's readers; only
+    the cell data is parsed here. Returns None for workbooks this path does
+    not cover (chartsheets), so the caller goes through openpyxl instead.
+    """
+    reader = ExcelReader(xlsx_path, read_only=True, data_only=True)
+    try:
+        reader.read_manifest()
+        shared_strings = _xlsx_shared_strings(reader)
+        reader.read_workbook()
+        workbook = reader.wb
+        apply_stylesheet(reader.archive, workbook)
+
+        lines = []
+        for sheet, rel in reader.parser.find_sheets():
+            if rel.target not in reader.valid_files:
+                continue
+            if "chartsheet" in rel.Type:
+                return None
+
+            lines.append(f"[Sheet: {sheet.name}]")
+            with reader.archive.open(rel.target) as source:
+                for row in _iter_sheet_rows(source, shared_strings,
+                                            workbook._date_formats, workbook.epoch):
+                    row_text = " | ".join(row)
+                    if row_text.strip():
+                        lines.append(row_text)
+        return lines
+    finally:
+        reader.archive.close()
+
+
 def extract_text_locally_from_pptx(pptx_path: str) -> Dict[str, any]:
     """
     Extract text from PowerPoint using python-pptx (LOCAL, no API calls).
@@ -403,7 +1092,7 @@ def extract_text_locally_from_pptx(pptx_path: str) -> Dict[str, any]:
         pptx_path (str): Path to the .pptx file
 
     Returns:
-        dict: Extraction result with 'success', 'text', and optional 'error'
+        dict: Extraction result with 'success', 'text' (already stripped), and optional 'error'
     """
     if not PPTX_AVAILABLE:
         return {
@@ -424,9 +1113,9 @@ def extract_text_locally_from_pptx(pptx_path: str) -> Dict[str, any]:
                 if hasattr(shape, "text") and shape.text.strip():
                     all_text.append(shape.text)
 
-        full_text = "\n".join(all_text)
+        full_text = "\n".join(all_text).strip()
 
-        if not full_text.strip():
+        if not full_text:
             return {
                 "success": True,
                 "text": "",
@@ -435,7 +1124,7 @@ def extract_text_locally_from_pptx(pptx_path: str) -> Dict[str, any]:
 
         return {
             "success": True,
-            "text": full_text.strip()
+            "text": full_text
         }
 
     except Exception as e:
@@ -446,6 +1135,25 @@ def extract_text_locally_from_pptx(pptx_path: str) -> Dict[str, any]:
         }
 
 
+def _read_utf8(path: str) -> str:
+    """
+    Read a UTF-8 text file, decoding straight from a memory map.
+
+    This skips the buffered read copy and the incremental text-mode decode.
+    Files containing carriage returns take the text-mode path so universal
+    newline translation stays exactly as before.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped.find(b"\r") == -1:
+                return str(mapped, 'utf-8')
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
 def extract_text_locally_from_txt(txt_path: str) -> Dict[str, any]:
     """
     Extract text from plain text file (LOCAL, no API calls).
@@ -454,13 +1162,12 @@ def extract_text_locally_from_txt(txt_path: str) -> Dict[str, any]:
         txt_path (str): Path to the .txt file
 
     Returns:
-        dict: Extraction result with 'success', 'text', and optional 'error'
+        dict: Extraction result with 'success', 'text' (already stripped), and optional 'error'
     """
     try:
-        with open(txt_path, 'r', encoding='utf-8') as f:
-            text = f.read()
+        text = _read_utf8(txt_path).strip()
 
-        if not text or not text.strip():
+        if not text:
             return {
                 "success": True,
                 "text": "",
@@ -469,7 +1176,7 @@ def extract_text_locally_from_txt(txt_path: str) -> Dict[str, any]:
 
         return {
             "success": True,
-            "text": text.strip()
+            "text": text
         }
 
     except Exception as e:
@@ -492,14 +1199,16 @@ def get_file_metadata(file_path: str) -> Dict[str, any]:
     """
     try:
         path = Path(file_path)
+        # One stat call covers size, existence and file type
+        file_stat = path.stat()
 
         return {
             "filename": path.name,
             "extension": path.suffix.lower(),
-            "size_bytes": path.stat().st_size,
-            "size_human": _human_readable_size(path.stat().st_size),
-            "exists": path.exists(),
-            "is_file": path.is_file()
+            "size_bytes": file_stat.st_size,
+            "size_human": _human_readable_size(file_stat.st_size),
+            "exists": True,
+            "is_file": S_ISREG(file_stat.st_mode)
         }
     except Exception as e:
         return {
@@ -509,13 +1218,14 @@ def get_file_metadata(file_path: str) -> Dict[str, any]:
         }
 
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+
 def _human_readable_size(size_bytes: int) -> str:
     """Convert bytes to human-readable format."""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.2f} TB"
+    # Each unit is 2**10 of the previous, so the bit length picks it directly
+    unit = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1) if size_bytes > 0 else 0
+    return f"{size_bytes / (1 << (10 * unit)):.2f} {_SIZE_UNITS[unit]}"
 
 
 def sanitize_text_locally(text: str, pii_patterns: List[str]) -> str:
@@ -534,7 +1244,126 @@ def sanitize_text_locally(text: str, pii_patterns: List[str]) -> str:
     return regex_sanitize(text)
 
 
-def process_file_securely(file_path: str, file_type: str, use_case: str = "general") -> Dict[str, any]:
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif']
+
+# File type -> (local extractor, extraction method label). The PDF label is
+# None: it names whichever PDF backend is installed, resolved per call.
+_EXTRACTORS = {
+    **{extension: (extract_text_locally_from_image, "pytesseract OCR") for extension in IMAGE_EXTENSIONS},
+    # The document is blocked on any secret, so decoding stops at the first one
+    '.pdf': (functools.partial(extract_text_locally_from_pdf, stop_at_secret=True), None),
+    '.docx': (extract_text_locally_from_docx, "python-docx"),
+    '.xlsx': (extract_text_locally_from_xlsx, "openpyxl"),
+    '.pptx': (extract_text_locally_from_pptx, "python-pptx"),
+    '.txt': (extract_text_locally_from_txt, "plain text"),
+}
+
+
+def _extract_locally(file_path: str, file_type: str) -> Optional[Tuple[Dict[str, any], str]]:
+    """
+    Run the local extractor for a file type.
+
+    Args:
+        file_path (str): Path to the file
+        file_type (str): File type/extension (e.g., '.png', '.pdf', '.docx')
+
+    Returns:
+        tuple: (extraction result, extraction method), or None if unsupported
+    """
+    entry = _EXTRACTORS.get(file_type.lower())
+    if entry is None:
+        return None
+
+    extractor, method = entry
+    return extractor(file_path), method or _pdf_backend() or "PyPDF2"
+
+
+# Extraction results for uploads seen before, keyed by a digest of the file's
+# bytes that the caller computes while receiving it. Results whose text holds
+# a secret are never stored, so blocked content does not stay in memory.
+_EXTRACTION_CACHE = ResultCache(
+    maxsize=int(os.getenv("EXTRACTION_CACHE_SIZE", "256")),
+    max_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+)
+
+
+def _extract_locally_cached(file_path: str, file_type: str,
+                            content_digest: str) -> Optional[Tuple[Dict[str, any], str]]:
+    """
+    Run _extract_locally() through the extraction cache.
+
+    A file resubmitted unchanged (same content_digest) reuses its previous
+    result instead of being parsed or OCR'd again. Failed extractions are
+    not stored either, since they may succeed on a retry.
+    """
+    file_type = file_type.lower()
+    key = (content_digest, file_type)
+    cached = _EXTRACTION_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    extracted = _extract_locally(file_path, file_type)
+    if extracted is not None and extracted[0]["success"]:
+        text = extracted[0].get("text", "")
+        if not detect_secrets(text)["found"]:
+            _EXTRACTION_CACHE.set(key, extracted, sys.getsizeof(text))
+    return extracted
+
+
+def _init_extraction_worker():
+    """Keep each worker's Tesseract single-threaded; the pool supplies the parallelism."""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def process_files_securely(paths: List[str], use_case: str = "general",
+                           max_workers: Optional[int] = None) -> List[Dict[str, any]]:
+    """
+    Process many files, extracting their text in parallel worker processes.
+
+    Extraction (OCR, PDF and Office parsing) is CPU-bound and independent per
+    file, so it fans out over a process pool. The secrets/PII/sanitization
+    pipeline then runs here, in order, exactly as for process_file_securely().
+
+    Args:
+        paths (list): Paths of the files to process; the type comes from the suffix
+        use_case (str): Context of request (debugging, support, docs, general)
+        max_workers (int): Worker processes (defaults to the CPU count)
+
+    Returns:
+        list: One decision result per path, in input order
+    """
+    if not paths:
+        return []
+
+    file_types = [Path(path).suffix for path in paths]
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    chunksize = max(1, len(paths) // (4 * workers))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_extraction_worker) as pool:
+        extractions = list(pool.map(_extract_locally, paths, file_types, chunksize=chunksize))
+
+    # Images whose local OCR failed share batched Gemini Vision requests
+    gemini_extractions = [None] * len(paths)
+    if _gemini_vision_fallback_enabled():
+        failed = [
+            index for index, (file_type, extracted) in enumerate(zip(file_types, extractions))
+            if extracted is not None and not extracted[0]["success"]
+            and file_type.lower() in IMAGE_EXTENSIONS
+        ]
+        if failed:
+            batch_results = extract_text_from_images_with_gemini([paths[index] for index in failed])
+            for index, gemini_extraction in zip(failed, batch_results):
+                gemini_extractions[index] = gemini_extraction
+
+    return [
+        _process_extracted_file(path, file_type, use_case, extracted, gemini_extraction)
+        for path, file_type, extracted, gemini_extraction
+        in zip(paths, file_types, extractions, gemini_extractions)
+    ]
+
+
+def process_file_securely(file_path: str, file_type: str, use_case: str = "general",
+                          content_digest: Optional[str] = None) -> Dict[str, any]:
     """
     MAIN SECURE PROCESSING FUNCTION - Security-First File Analysis
 
@@ -550,14 +1379,37 @@ def process_file_securely(file_path: str, file_type: str, use_case: str = "gener
         file_path (str): Path to the file to process
         file_type (str): File type/extension (e.g., '.png', '.pdf', '.docx')
         use_case (str): Context of request (debugging, support, docs, general)
+        content_digest (str): Digest of the file's bytes; when given, the
+            extraction is looked up in and stored to the extraction cache
 
     Returns:
         dict: Decision result matching the format of process_input() from planner.py
     """
+    if content_digest is None:
+        extracted = _extract_locally(file_path, file_type)
+    else:
+        extracted = _extract_locally_cached(file_path, file_type, content_digest)
+    return _process_extracted_file(file_path, file_type, use_case, extracted)
+
+
+def _gemini_vision_fallback_enabled() -> bool:
+    """Whether USE_GEMINI_VISION_FOR_OCR allows sending images to Gemini Vision."""
+    return os.getenv("USE_GEMINI_VISION_FOR_OCR", "false").lower() == "true"
+
+
+def _process_extracted_file(file_path: str, file_type: str, use_case: str,
+                            extracted: Optional[Tuple[Dict[str, any], str]],
+                            gemini_extraction: Optional[Dict[str, any]] = None) -> Dict[str, any]:
+    """
+    Run phases 2-9 of process_file_securely() on an _extract_locally() result.
+
+    gemini_extraction is an already fetched Gemini Vision result to use if
+    local OCR failed; without it the fallback calls Gemini for this file.
+    """
     # Initialize execution context
     execution_trace = []
-    audit_id = str(uuid.uuid4())
-    timestamp = datetime.utcnow().isoformat() + "Z"
+    audit_id = new_audit_id()
+    timestamp = utc_timestamp()
     gemini_called = False
     processing_method = "local_only"
 
@@ -571,27 +1423,10 @@ def process_file_securely(file_path: str, file_type: str, use_case: str = "gener
     # PHASE 1: LOCAL TEXT EXTRACTION (NO API CALLS)
     execution_trace.append("ACT: Phase 1 - LOCAL text extraction (no API calls)")
 
-    # Determine extraction method based on file type
     file_type_lower = file_type.lower()
 
-    if file_type_lower in ['.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif']:
-        extraction_result = extract_text_locally_from_image(file_path)
-        extraction_method = "pytesseract OCR"
-    elif file_type_lower == '.pdf':
-        extraction_result = extract_text_locally_from_pdf(file_path)
-        extraction_method = "PyPDF2"
-    elif file_type_lower == '.docx':
-        extraction_result = extract_text_locally_from_docx(file_path)
-        extraction_method = "python-docx"
-    elif file_type_lower == '.xlsx':
-        extraction_result = extract_text_locally_from_xlsx(file_path)
-        extraction_method = "openpyxl"
-    elif file_type_lower == '.pptx':
-        extraction_result = extract_text_locally_from_pptx(file_path)
-        extraction_method = "python-pptx"
-    elif file_type_lower == '.txt':
-        extraction_result = extract_text_locally_from_txt(file_path)
-        extraction_method = "plain text"
+    if extracted is not None:
+        extraction_result, extraction_method = extracted
     else:
         return {
             "decision": "BLOCK",
@@ -613,14 +1448,15 @@ def process_file_securely(file_path: str, file_type: str, use_case: str = "gener
 
         # SECURITY OPTION: Allow Gemini Vision as fallback for images ONLY
         # This is controlled by environment variable for security
-        use_gemini_fallback = os.getenv("USE_GEMINI_VISION_FOR_OCR", "false").lower() == "true"
+        use_gemini_fallback = _gemini_vision_fallback_enabled()
 
-        if file_type_lower in ['.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif'] and use_gemini_fallback:
+        if file_type_lower in IMAGE_EXTENSIONS and use_gemini_fallback:
             execution_trace.append("   FALLBACK: Attempting Gemini Vision OCR (environment variable enabled)")
-            print("[SECURITY WARNING] Using Gemini Vision API as fallback - raw image will be sent to Google")
-            print("                   To disable, set USE_GEMINI_VISION_FOR_OCR=false in .env")
+            logger.warning("SECURITY: Using Gemini Vision API as fallback - raw image will be sent to Google. "
+                           "To disable, set USE_GEMINI_VISION_FOR_OCR=false in .env")
 
-            gemini_extraction = extract_text_from_image_with_gemini(file_path)
+            if gemini_extraction is None:
+                gemini_extraction = extract_text_from_image_with_gemini(file_path)
             if gemini_extraction["success"]:
                 extracted_text = gemini_extraction["text"]
                 extraction_method = "Gemini Vision (fallback)"
@@ -656,15 +1492,16 @@ def process_file_securely(file_path: str, file_type: str, use_case: str = "gener
         extracted_text = extraction_result["text"]
         execution_trace.append(f"   Successfully extracted {len(extracted_text)} characters using {extraction_method}")
 
-    # Debug: Print extracted text to see what OCR found
-    print(f"[OCR] Extracted text preview (first 500 chars):")
-    print(f"       {extracted_text[:500] if extracted_text else '(empty)'}")
+    # Debug: log the extracted text to see what OCR found
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Extracted text preview (first 500 chars): %s",
+                     extracted_text[:500] if extracted_text else "(empty)")
 
     if extraction_result.get("warning"):
         execution_trace.append(f"   Warning: {extraction_result['warning']}")
 
-    # Handle empty content
-    if not extracted_text or not extracted_text.strip():
+    # Handle empty content (extractors return stripped text)
+    if not extracted_text:
         execution_trace.append("   No text content found in file")
         execution_trace.append("DECIDE: ALLOW (empty file, no sensitive data)")
 
@@ -684,8 +1521,10 @@ def process_file_securely(file_path: str, file_type: str, use_case: str = "gener
         }
 
     # PHASE 2: LOCAL SECRETS DETECTION (NO API CALLS)
+    # One scan settles both secrets and PII; PII is only acted on if no secret
     execution_trace.append("ACT: Phase 2 - LOCAL secrets detection (no API calls)")
-    secrets_result = detect_secrets(extracted_text)
+    scan_result = scan_text(extracted_text)
+    secrets_result = scan_result["secrets"]
 
     if secrets_result["found"]:
         # CRITICAL: EARLY EXIT - Secrets found, BLOCK immediately
@@ -696,12 +1535,8 @@ def process_file_securely(file_path: str, file_type: str, use_case: str = "gener
         policy_result = evaluate_policy(use_case, True, False, [])
         risk_score = calculate_risk_score(True, False, [], False)
 
-        explanation = generate_explanation(
-            "BLOCK",
-            risk_score,
-            True,
-            False,
-            [],
+        explanation = render_block_explanation(
+            secrets_result["pattern"],
             policy_result["policy_refs"]
         )
 
@@ -731,7 +1566,7 @@ def process_file_securely(file_path: str, file_type: str, use_case: str = "gener
 
     # PHASE 3: LOCAL PII DETECTION (NO API CALLS)
     execution_trace.append("ACT: Phase 3 - LOCAL PII detection (no API calls)")
-    pii_result = detect_pii(extracted_text)
+    pii_result = scan_result["pii"]
 
     pii_found = pii_result["found"]
     pii_types = pii_result["types"]
@@ -762,12 +1597,15 @@ def process_file_securely(file_path: str, file_type: str, use_case: str = "gener
     if policy_result["allow_sanitization"] and sanitization_applied:
         execution_trace.append("ACT: Phase 6 - Gemini analysis (on SANITIZED content only)")
         gemini_result = sanitize_with_gemini(sanitized_text)
-        gemini_called = True
-        processing_method = "local_then_gemini"
 
         if gemini_result["used_llm"]:
+            gemini_called = True
+            processing_method = "local_then_gemini"
             execution_trace.append(f"   Gemini analysis complete (model: {gemini_result.get('model_used', 'gemini')})")
             sanitized_text = gemini_result["sanitized_text"]
+        elif gemini_result.get("model_used") in ("no_op", "regex"):
+            # The locally sanitized text left nothing for Gemini to mask
+            execution_trace.append("   Regex result clean, Gemini skipped")
         else:
             execution_trace.append("   Gemini unavailable, using local sanitization")
 
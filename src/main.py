@@ -19,6 +19,7 @@ ENDPOINTS:
     GET    /health                    # Health check and configuration
     GET    /stats                     # Agent decision statistics
     GET    /history                   # Recent decision history
+    GET    /history/stream            # Decision history as JSON Lines
     GET    /docs                      # Interactive API documentation
 """
 
@@ -32,19 +33,46 @@ sys.path.insert(0, str(Path(__file__).parent))
 # FastAPI imports
 from fastapi import FastAPI, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
+import asyncio
+import copy
+import hashlib
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
 import tempfile
 import os as os_module
 
+# Responses are encoded with orjson when it is installed
+try:
+    import orjson  # noqa: F401  (required by ORJSONResponse)
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
+
 # Agent modules (following hackathon architecture requirements)
-from planner import plan_and_execute                # Planner module (ReAct pattern)
+from planner import (                                 # Planner module (ReAct pattern)
+    plan_and_execute,
+    plan_and_execute_async
+)
 from memory import (                                  # Memory module (audit trail)
     init_memory,
+    flush_decisions,
+    log_decision,
+    new_audit_id,
+    utc_timestamp,
     get_decision_statistics,
-    retrieve_recent_decisions
+    retrieve_recent_decisions,
+    stream_recent_decisions
+)
+from executor import (                                # Executor module (tool calls)
+    ResultCache,
+    test_gemini_connection,
+    cache_stats
 )
-from executor import test_gemini_connection          # Executor module (tool calls)
 from extractors import process_file_securely         # File processing (multi-modal)
 
 
@@ -55,11 +83,46 @@ from extractors import process_file_securely         # File processing (multi-mo
 # Load environment variables (.env file)
 load_dotenv()
 
+# Request, memory and executor diagnostics go through `logging`; LOG_LEVEL=DEBUG
+# shows per-model failures. Records are handed to a queue and a listener
+# thread does the formatting and stream writes, so a slow terminal or log
+# collector never stalls a request.
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter("[%(name)s] %(levelname)s %(message)s"))
+_LOG_LISTENER = QueueListener(queue.SimpleQueue(), _log_stream)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(message)s",  # the queued message only; _log_stream adds the prefix
+    handlers=[QueueHandler(_LOG_LISTENER.queue)]
+)
+_LOG_LISTENER.start()
+
+
+@atexit.register
+def _stop_logging():
+    """Write out queued audit records, then drain and stop the log listener."""
+    flush_decisions()
+    _LOG_LISTENER.stop()
+
+
+logger = logging.getLogger("leaklockai")
+
+# Whole /analyze responses for content seen before, keyed by a digest of the
+# exact text. BLOCK results are never stored, so no secret-bearing content
+# or its preview stays in memory; neither are results where a Gemini step
+# fell back.
+_ANALYSIS_CACHE = ResultCache(
+    maxsize=int(os.getenv("ANALYSIS_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("ANALYSIS_CACHE_TTL", "3600")),
+    max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+)
+
 # Initialize FastAPI application
 app = FastAPI(
     title="LeakLockAI - Agentic Content Security System",
     description="Intelligent agent that detects secrets & PII, makes autonomous security decisions",
-    version="2.0.0"  # v2.0 with Smart Sanitization
+    version="2.0.0",  # v2.0 with Smart Sanitization
+    default_response_class=DefaultResponse
 )
 
 # Enable CORS for frontend integration
@@ -122,10 +185,65 @@ async def startup_event():
     print("=" * 80)
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write out any audit records still queued by the memory module."""
+    await asyncio.to_thread(flush_decisions)
+
+
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
 
+def _response_size(result):
+    """Approximate bytes held by the strings of an analysis response."""
+    size = 0
+    for value in result.values():
+        if isinstance(value, str):
+            size += sys.getsizeof(value)
+        elif isinstance(value, dict):
+            size += sum(sys.getsizeof(item) for item in value.values() if isinstance(item, str))
+    return size
+
+
+def _gemini_succeeded(result):
+    """True unless a Gemini-backed step that ran for this result fell back."""
+    return (result.get("sanitization_model") != "regex_fallback"
+            and result.get("smart_sanitization_used_llm", True)
+            and result.get("explanation_used_llm", True))
+
+
+async def analyze_with_cache(content):
+    """
+    Run plan_and_execute_async(), answering repeated content from _ANALYSIS_CACHE.
+
+    A cache hit is still a decision of its own: it gets a fresh audit_id and
+    timestamp and is logged to memory, with a trace pointing at the original.
+    """
+    key = hashlib.blake2b(content.encode("utf-8", "surrogatepass")).hexdigest()
+
+    cached = _ANALYSIS_CACHE.get(key)
+    if cached is not None:
+        result = copy.deepcopy(cached)
+        result["audit_id"] = new_audit_id()
+        result["timestamp"] = utc_timestamp()
+        result["cached"] = True
+        log_decision(
+            result["decision"],
+            result["explanation"],
+            [f"CACHE: Reused analysis of identical content (audit_id: {cached['audit_id']})"],
+            result["audit_id"]
+        )
+        return result
+
+    result = await plan_and_execute_async(content)
+    # Only keep results whose Gemini steps all succeeded, so a fallback forced
+    # by an outage (or a missing key) is not served once Gemini recovers
+    if result["decision"] != "BLOCK" and _gemini_succeeded(result):
+        _ANALYSIS_CACHE.set(key, copy.deepcopy(result), _response_size(result))
+    return result
+
+
 @app.post("/analyze")
 async def analyze(request: AnalyzeRequest):
     """
@@ -153,22 +271,34 @@ async def analyze(request: AnalyzeRequest):
             - explanation (str): Human-readable reasoning
             - policy_refs (list): Applied security policies
             - detected_signals (list): What was found (secrets/PII)
-            - masked_content (str): Standard sanitization
+            - safe_prompt (str): Standard sanitization
+            - diff (dict): Changed line ranges from content to safe_prompt
             - smart_sanitized_content (str): Context-aware rewrite (v2.0 feature)
-            - sanitization_comparison (dict): Side-by-side comparison
+            - sanitization_comparison (dict): Changed line ranges of both rewrites
             - audit_id (str): Unique ID for audit trail
     """
-    print(f"\n[REQUEST] Content analysis ({len(request.content)} chars)")
+    logger.info("Request: content analysis (%d chars)", len(request.content))
 
     # Execute agent's autonomous decision-making workflow
-    # This calls planner.py which orchestrates the entire ReAct cycle
-    result = plan_and_execute(request.content)
+    # This calls planner.py which orchestrates the entire ReAct cycle,
+    # unless identical content was analyzed recently. The planner runs its
+    # blocking steps (regex scans, Gemini calls) on worker threads itself
+    result = await analyze_with_cache(request.content)
 
-    print(f"[DECISION] {result['decision']} (risk: {result['risk_score']}/100)")
+    logger.info("Decision: %s (risk: %s/100)", result["decision"], result["risk_score"])
 
     return result
 
 
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Upload types accepted by /analyze-file, in the order /health reports them
+_SUPPORTED_TYPE_LIST = ('.png', '.jpg', '.jpeg', '.webp', '.pdf',
+                        '.docx', '.xlsx', '.pptx', '.txt')
+SUPPORTED_TYPES = frozenset(_SUPPORTED_TYPE_LIST)
+_SUPPORTED_TYPES_MESSAGE = ', '.join(_SUPPORTED_TYPE_LIST)
+
+
 @app.post("/analyze-file")
 async def analyze_file(
     file: UploadFile = File(...),
@@ -181,7 +311,7 @@ async def analyze_file(
 
     **ZERO-LEAK SECURITY ARCHITECTURE** (Key Innovation):
     1. Save file to secure temp location
-    2. Extract text LOCALLY (OCR for images, PyPDF2 for PDFs, python-docx for Office)
+    2. Extract text LOCALLY (OCR for images, pypdfium2 or PyPDF2 for PDFs, python-docx for Office)
     3. Run LOCAL regex-based secrets detection (NO external API calls)
     4. If secrets found → BLOCK immediately (Gemini NEVER sees secrets)
     5. Run LOCAL PII detection with regex
@@ -201,23 +331,18 @@ async def analyze_file(
             - gemini_called (bool): Whether Gemini API was invoked
             - processing_method (str): "local_only", "local_then_gemini", etc.
     """
-    print(f"\n[FILE] Upload received: {file.filename}")
-
     # Extract file extension for type validation
     file_extension = os_module.path.splitext(file.filename)[1].lower()
-    print(f"       Type: {file_extension}")
+    logger.info("File upload received: %s (type: %s)", file.filename, file_extension)
 
     # Validate against supported file types
-    supported_types = ['.png', '.jpg', '.jpeg', '.webp', '.pdf',
-                      '.docx', '.xlsx', '.pptx', '.txt']
-
-    if file_extension not in supported_types:
-        print(f"[ERROR] Unsupported file type")
+    if file_extension not in SUPPORTED_TYPES:
+        logger.warning("Unsupported file type: %s", file_extension)
         return {
             "decision": "BLOCK",
             "risk_score": 50,
             "explanation": f"Unsupported file type: {file_extension}. "
-                          f"Supported: {', '.join(supported_types)}",
+                          f"Supported: {_SUPPORTED_TYPES_MESSAGE}",
             "file_info": {
                 "filename": file.filename,
                 "type": file_extension,
@@ -231,23 +356,28 @@ async def analyze_file(
     temp_file = None
     try:
         # Create temporary file with correct extension
+        # The upload is copied over in 1 MiB chunks, never held in memory whole,
+        # and hashed on the way for the extraction cache
+        digest = hashlib.blake2b()
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp:
-            content = await file.read()
-            temp.write(content)
             temp_file = temp.name
-            print(f"       Temp: {temp_file}")
+            while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                temp.write(chunk)
 
         # Process file using ZERO-LEAK architecture (extractors.py)
-        print(f"[SECURE] Processing with local-first approach...")
-        result = process_file_securely(temp_file, file_extension, use_case)
+        logger.info("Processing %s with local-first approach", temp_file)
+        # Extraction and OCR are blocking; a worker thread keeps the event loop serving
+        result = await asyncio.to_thread(process_file_securely, temp_file, file_extension,
+                                         use_case, digest.hexdigest())
 
-        print(f"[RESULT] {result['decision']} (risk: {result['risk_score']}/100)")
-        print(f"         Gemini called: {result.get('gemini_called', False)}")
+        logger.info("File result: %s (risk: %s/100, Gemini called: %s)",
+                    result["decision"], result["risk_score"], result.get("gemini_called", False))
 
         return result
 
     except Exception as e:
-        print(f"[ERROR] Processing failed: {str(e)}")
+        logger.error("File processing failed: %s", e)
         return {
             "decision": "BLOCK",
             "risk_score": 50,
@@ -265,9 +395,20 @@ async def analyze_file(
         if temp_file and os_module.path.exists(temp_file):
             try:
                 os_module.remove(temp_file)
-                print(f"[CLEANUP] Temp file deleted")
+                logger.debug("Temp file deleted: %s", temp_file)
             except Exception as e:
-                print(f"[WARNING] Cleanup failed: {str(e)}")
+                logger.warning("Temp file cleanup failed: %s", e)
+
+
+# Nothing in the health report changes after startup (.env is loaded once),
+# so liveness probes get the same prebuilt dict every time
+_HEALTH = {
+    "status": "healthy",
+    "agent": "LeakLockAI",
+    "gemini_configured": bool(os.getenv("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEYS")),
+    "file_upload_enabled": True,
+    "supported_file_types": list(_SUPPORTED_TYPE_LIST)
+}
 
 
 @app.get("/health")
@@ -278,14 +419,7 @@ async def health():
     Returns:
         dict: System status and configuration
     """
-    return {
-        "status": "healthy",
-        "agent": "LeakLockAI",
-        "gemini_configured": bool(os.getenv("GEMINI_API_KEY")),
-        "file_upload_enabled": True,
-        "supported_file_types": [".png", ".jpg", ".jpeg", ".webp",
-                                ".pdf", ".docx", ".xlsx", ".pptx", ".txt"]
-    }
+    return _HEALTH
 
 
 @app.get("/stats")
@@ -294,9 +428,12 @@ async def stats():
     Get agent decision statistics from memory module.
 
     Returns:
-        dict: Total decisions, block count, sanitize count, etc.
+        dict: Total decisions, block count, sanitize count, result cache hits, etc.
     """
-    return get_decision_statistics()
+    statistics = get_decision_statistics()
+    statistics["cache"] = cache_stats()
+    statistics["cache"]["analysis"] = _ANALYSIS_CACHE.stats()
+    return statistics
 
 
 @app.get("/history")
@@ -313,6 +450,23 @@ async def history(limit: int = 10):
     return retrieve_recent_decisions(limit)
 
 
+@app.get("/history/stream")
+def history_stream(limit: int = 1000):
+    """
+    Stream recent decision history as JSON Lines, for large exports.
+
+    Records are written out as they are read from the database, so memory
+    use does not grow with the limit and the first record arrives at once.
+
+    Args:
+        limit (int): Maximum number of recent decisions (all if negative)
+
+    Returns:
+        StreamingResponse: application/x-ndjson, one decision record per line
+    """
+    return StreamingResponse(stream_recent_decisions(limit), media_type="application/x-ndjson")
+
+
 # ============================================================================
 # CLI MODE - Interactive Testing
 # ============================================================================
@@ -15,10 +15,10 @@ HACKATHON REQUIREMENT FULFILLMENT:
 
 DATABASE SCHEMA:
 - audit_id      : Unique identifier for each decision
-- timestamp     : When the decision was made
+- timestamp     : When the decision was made (UTC, ns since the epoch)
 - decision      : BLOCK or SANITIZE
 - reason        : Human-readable explanation
-- execution_trace : Step-by-step reasoning (JSON)
+- execution_trace : Step-by-step reasoning (JSON, zlib-compressed when smaller)
 
 OBSERVABILITY FEATURES:
 - Real-time decision logging
@@ -28,15 +28,138 @@ OBSERVABILITY FEATURES:
 - Full ReAct execution traces preserved
 """
 
+import atexit
+import itertools
+import queue
 import sqlite3
 import json
-from datetime import datetime
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+# orjson encodes/decodes execution traces natively when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
 
 # Database configuration
 DB_PATH = Path(__file__).parent.parent / "storage" / "leaklock.db"
 
+# One connection is shared by every write instead of a connect/close per
+# query. It runs in autocommit mode, and _LOCK serializes its use across
+# the server's worker threads. Reads go through a second, read-only
+# connection under _READ_LOCK: under WAL they see every committed row and
+# never wait for the background writer's transactions.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+)
+_CONN = None
+_CONN_PATH = None
+
+# Timestamps are stored as integer UTC nanoseconds and only formatted for
+# the records a read actually returns
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_RESPONSE_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+_EVENTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS audit_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        audit_id TEXT UNIQUE NOT NULL,
+        timestamp INTEGER NOT NULL,
+        decision TEXT NOT NULL,
+        reason TEXT NOT NULL,
+        execution_trace BLOB NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Kept as one constant so every insert hits the connection's statement cache
+_INSERT_SQL = """
+    INSERT INTO audit_events (audit_id, timestamp, decision, reason, execution_trace)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# log_decision() only queues the row; a background thread writes whatever
+# has piled up in one transaction, so requests never wait on the commit.
+# Reads call flush_decisions() first and so always see every queued row.
+_LOG_BATCH_SIZE = 100
+_LOG_QUEUE = queue.SimpleQueue()
+_WRITER = None
+_WRITER_LOCK = threading.Lock()
+
+# The newest decisions as (timestamp ns, record) pairs, newest first, so
+# /history polling is served without touching SQLite. None means "not
+# loaded": it is filled by the first read and then kept current by the writer.
+_RECENT_SIZE = 128
+_RECENT = None
+_LOCK = threading.RLock()
+_READ_PRAGMAS = ("PRAGMA temp_store=MEMORY", "PRAGMA cache_size=-8000")
+_READ_CONN = None
+_READ_CONN_PATH = None
+_READ_LOCK = threading.Lock()
+
+# DB_PATH as of the last init_memory(); once it matches, the schema is known
+# to exist and calls skip the per-call file existence check
+_INITIALIZED_PATH = None
+
+
+def _connection(reopen=False):
+    """
+    Return the shared connection to DB_PATH, opening it on first use.
+
+    It is reopened when DB_PATH has been pointed elsewhere or when reopen is
+    set. Callers must hold _LOCK.
+    """
+    global _CONN, _CONN_PATH, _RECENT
+
+    if _CONN is not None and (reopen or _CONN_PATH != DB_PATH):
+        _CONN.close()
+        _CONN = None
+
+    if _CONN is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        _CONN, _CONN_PATH = conn, DB_PATH
+        _RECENT = None
+
+    return _CONN
+
+
+def _read_connection():
+    """
+    Return the shared read-only connection to DB_PATH. Callers must hold _READ_LOCK.
+
+    init_memory() must have run on DB_PATH first, so the file and its WAL exist.
+    """
+    global _READ_CONN, _READ_CONN_PATH
+
+    if _READ_CONN is not None and _READ_CONN_PATH != DB_PATH:
+        _READ_CONN.close()
+        _READ_CONN = None
+
+    if _READ_CONN is None:
+        uri = DB_PATH.resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        for pragma in _READ_PRAGMAS:
+            conn.execute(pragma)
+        _READ_CONN, _READ_CONN_PATH = conn, DB_PATH
+
+    return _READ_CONN
+
 
 def init_memory():
     """
@@ -45,24 +168,45 @@ def init_memory():
     Creates the necessary database tables if they don't exist.
     This is called on application startup.
     """
+    global _INITIALIZED_PATH, _READ_CONN
+
     # Ensure storage directory exists
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    conn = sqlite3.connect(DB_PATH)
+    with _LOCK:
+        # Fresh connections, in case the database file was removed under the old ones
+        _create_tables(_connection(reopen=True))
+        with _READ_LOCK:
+            if _READ_CONN is not None:
+                _READ_CONN.close()
+                _READ_CONN = None
+        _INITIALIZED_PATH = DB_PATH
+
+    logger.info("Database initialized at %s", DB_PATH)
+
+
+def _ready():
+    """
+    Whether DB_PATH holds an initialized database.
+
+    A database file that exists but was not initialized by this process is
+    (idempotently) initialized on first use; a missing one is left alone.
+    """
+    if _INITIALIZED_PATH == DB_PATH:
+        return True
+    if not DB_PATH.exists():
+        return False
+    init_memory()
+    return True
+
+
+def _create_tables(conn):
+    """Create the audit tables and indexes if they don't exist."""
     cursor = conn.cursor()
 
     # Create audit events table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS audit_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            audit_id TEXT UNIQUE NOT NULL,
-            timestamp TEXT NOT NULL,
-            decision TEXT NOT NULL,
-            reason TEXT NOT NULL,
-            execution_trace TEXT NOT NULL,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    cursor.execute(_EVENTS_TABLE_SQL)
+    _upgrade_text_timestamps(conn)
 
     # Create index for faster lookups
     cursor.execute("""
@@ -75,52 +219,277 @@ def init_memory():
         ON audit_events(timestamp DESC)
     """)
 
-    conn.commit()
-    conn.close()
+    # Lets the statistics query count decisions from the index alone
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_decision
+        ON audit_events(decision)
+    """)
+
+
+def _upgrade_text_timestamps(conn):
+    """
+    Convert a database whose timestamp column still holds ISO strings.
+
+    The table is rebuilt once with an INTEGER column; its indexes are
+    dropped along with the old table and recreated by _create_tables.
+    """
+    columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(audit_events)")}
+    if columns.get("timestamp") != "TEXT":
+        return
+
+    conn.execute("BEGIN")
+    try:
+        conn.execute("ALTER TABLE audit_events RENAME TO audit_events_legacy")
+        conn.execute(_EVENTS_TABLE_SQL)
+        rows = conn.execute("""
+            SELECT id, audit_id, timestamp, decision, reason, execution_trace, created_at
+            FROM audit_events_legacy
+        """).fetchall()
+        conn.executemany("""
+            INSERT INTO audit_events
+                (id, audit_id, timestamp, decision, reason, execution_trace, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (row[0], row[1], _parse_timestamp(row[2])) + row[3:] for row in rows
+        ])
+        conn.execute("DROP TABLE audit_events_legacy")
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        conn.execute("ROLLBACK")
+        raise
+
+    logger.info("Converted %d stored timestamps to integers", len(rows))
+
+
+def _parse_timestamp(text):
+    """Nanoseconds since the epoch for a naive UTC ISO timestamp."""
+    return (datetime.fromisoformat(text) - _EPOCH) // _MICROSECOND * 1000
+
+
+def _format_timestamp(ns):
+    """Naive UTC ISO string for a stored timestamp, as the API has always returned."""
+    return (_EPOCH + timedelta(microseconds=ns // 1000)).isoformat()
+
+
+def new_audit_id():
+    """Unique audit ID: nanosecond clock plus 32 random bits (cheaper than uuid4)."""
+    return f"{time.time_ns():x}-{os.urandom(4).hex()}"
+
+
+def utc_timestamp():
+    """Current UTC time as an ISO 8601 string with a Z suffix."""
+    return datetime.now(timezone.utc).strftime(_RESPONSE_TIMESTAMP_FORMAT)
+
+
+# Traces repeat the same step phrases, so they are stored zlib-compressed
+# as BLOBs. Tiny traces that would not shrink stay JSON text, as do rows
+# written before compression; readers tell the two apart by type.
+_TRACE_COMPRESS_LEVEL = 6
+
+
+def _format_trace(trace):
+    """
+    Render an execution trace to its list of step strings.
+
+    Steps are plain strings or (template, *args) tuples that were left
+    unformatted on the request path; list arguments are comma-joined.
+    """
+    return [
+        step if isinstance(step, str) else step[0].format(*(
+            ", ".join(arg) if isinstance(arg, (list, tuple)) else arg
+            for arg in step[1:]
+        ))
+        for step in trace
+    ]
+
+
+def _dump_trace(trace):
+    """Serialize an execution trace for storage, preferring orjson."""
+    data = None
+    if orjson is not None:
+        try:
+            data = orjson.dumps(trace, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # Something orjson can't encode, e.g. an int beyond 64 bits
+    if data is None:
+        data = json.dumps(trace).encode()
+
+    compressed = zlib.compress(data, _TRACE_COMPRESS_LEVEL)
+    return compressed if len(compressed) < len(data) else data.decode()
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _load_trace(stored):
+    """Execution trace from a stored value, compressed BLOB or JSON text."""
+    if isinstance(stored, bytes):
+        stored = zlib.decompress(stored)
+    return _loads(stored)
 
-    print(f"[MEMORY] Database initialized at {DB_PATH}")
+
+def _record(row):
+    """Decision record for an (audit_id, timestamp, decision, reason, trace) row."""
+    return {
+        "audit_id": row[0],
+        "timestamp": _format_timestamp(row[1]),
+        "decision": row[2],
+        "reason": row[3],
+        "execution_trace": _load_trace(row[4])
+    }
+
+
+def _remember_recent(rows):
+    """
+    Put newly written rows at the front of _RECENT. Callers must hold _LOCK.
+
+    A row older than the current front (two requests racing for the queue)
+    drops the cache instead, so it is reloaded in SQL order.
+    """
+    global _RECENT
+
+    if _RECENT is None:
+        return
+    for row in sorted(rows, key=lambda row: row[1]):
+        if _RECENT and row[1] < _RECENT[0][0]:
+            _RECENT = None
+            return
+        _RECENT.appendleft((row[1], _record(row)))
+
+
+def _write_events(rows):
+    """
+    Insert audit rows in a single transaction.
+
+    Rows are (audit_id, timestamp, decision, reason, execution_trace)
+    tuples. If the batch hits a duplicate audit_id it is rolled back and
+    replayed row by row, so the other rows still land.
+
+    Returns:
+        list: audit_ids that were skipped as duplicates
+    """
+    with _LOCK:
+        conn = _connection()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(_INSERT_SQL, rows)
+            conn.execute("COMMIT")
+            return []
+        except sqlite3.IntegrityError:
+            conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        duplicates = []
+        for row in rows:
+            try:
+                conn.execute(_INSERT_SQL, row)
+            except sqlite3.IntegrityError:
+                duplicates.append(row[0])
+        return duplicates
+
+
+def _writer_loop():
+    """
+    Drain _LOG_QUEUE forever, writing up to _LOG_BATCH_SIZE rows at a time.
+
+    Traces arrive raw; rendering and serializing them happens here so the
+    request that logged them never pays for it. An event that cannot be
+    rendered is logged and skipped, and a failed write only loses its own
+    batch: the thread keeps running. Queued threading.Event markers are set
+    once every row queued before them has been handled.
+    """
+    while True:
+        events = [_LOG_QUEUE.get()]
+        while len(events) < _LOG_BATCH_SIZE:
+            try:
+                events.append(_LOG_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+
+        batch = []
+        markers = []
+        for event in events:
+            if isinstance(event, threading.Event):
+                markers.append(event)
+                continue
+            audit_id, timestamp, decision, reason, trace = event
+            try:
+                batch.append((audit_id, timestamp, decision, reason, _dump_trace(_format_trace(trace))))
+            except Exception:
+                logger.exception("Skipping decision %s: its trace could not be rendered", audit_id)
+
+        try:
+            if batch:
+                with _LOCK:
+                    duplicates = _write_events(batch)
+                    _remember_recent([row for row in batch if row[0] not in duplicates])
+                for audit_id in duplicates:
+                    logger.warning("Duplicate audit_id %s", audit_id)
+        except Exception as e:
+            logger.error("Failed to write %d decision(s): %s", len(batch), e)
+        finally:
+            for marker in markers:
+                marker.set()
+
+
+def _ensure_writer():
+    """Start the background writer thread if it isn't running yet."""
+    global _WRITER
+
+    with _WRITER_LOCK:
+        if _WRITER is None or not _WRITER.is_alive():
+            _WRITER = threading.Thread(target=_writer_loop, name="memory-writer", daemon=True)
+            _WRITER.start()
+
+
+def flush_decisions():
+    """
+    Block until every decision queued so far has been written to the database.
+
+    Called before reads, and on shutdown so that no audit record is lost.
+    Rows queued after the call are not waited for, so steady logging cannot
+    hold a read up.
+    """
+    if _WRITER is not None and _WRITER.is_alive():
+        marker = threading.Event()
+        _LOG_QUEUE.put_nowait(marker)
+        marker.wait()
+
+
+atexit.register(flush_decisions)
 
 
 def log_decision(decision, reason, trace, audit_id):
     """
     Store a decision event in memory.
 
-    This creates a permanent record of the agent's reasoning process,
-    enabling full observability and audit capabilities.
+    The row is queued and written by the background writer; use
+    flush_decisions() to wait for it. This creates a permanent record of
+    the agent's reasoning process, enabling full observability and audit
+    capabilities.
 
     Args:
         decision (str): Either 'BLOCK' or 'SANITIZE'
         reason (str): Human-readable explanation for the decision
-        trace (list): Execution trace showing step-by-step reasoning
+        trace (list): Execution trace showing step-by-step reasoning, as
+            strings or (template, *args) steps; must not be mutated afterwards
         audit_id (str): Unique identifier for this decision event
 
     Returns:
         str: The audit_id of the stored event
     """
     # Ensure database exists
-    if not DB_PATH.exists():
+    if _INITIALIZED_PATH != DB_PATH:
         init_memory()
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    timestamp = datetime.utcnow().isoformat()
-    trace_json = json.dumps(trace)
-
-    try:
-        cursor.execute("""
-            INSERT INTO audit_events (audit_id, timestamp, decision, reason, execution_trace)
-            VALUES (?, ?, ?, ?, ?)
-        """, (audit_id, timestamp, decision, reason, trace_json))
-
-        conn.commit()
-        print(f"[MEMORY] Logged decision: {decision} (audit_id: {audit_id})")
+    timestamp = time.time_ns()
 
-    except sqlite3.IntegrityError:
-        print(f"[MEMORY] Warning: Duplicate audit_id {audit_id}")
-
-    finally:
-        conn.close()
+    _ensure_writer()
+    _LOG_QUEUE.put_nowait((audit_id, timestamp, decision, reason, trace))
+    logger.info("Logged decision: %s (audit_id: %s)", decision, audit_id)
 
     return audit_id
 
@@ -135,29 +504,20 @@ def retrieve_decision(audit_id):
     Returns:
         dict: The decision record, or None if not found
     """
-    if not DB_PATH.exists():
+    if not _ready():
         return None
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT audit_id, timestamp, decision, reason, execution_trace
-        FROM audit_events
-        WHERE audit_id = ?
-    """, (audit_id,))
+    flush_decisions()
 
-    row = cursor.fetchone()
-    conn.close()
+    with _READ_LOCK:
+        row = _read_connection().execute("""
+            SELECT audit_id, timestamp, decision, reason, execution_trace
+            FROM audit_events
+            WHERE audit_id = ?
+        """, (audit_id,)).fetchone()
 
     if row:
-        return {
-            "audit_id": row[0],
-            "timestamp": row[1],
-            "decision": row[2],
-            "reason": row[3],
-            "execution_trace": json.loads(row[4])
-        }
+        return _record(row)
 
     return None
 
@@ -167,7 +527,8 @@ def retrieve_recent_decisions(limit=10):
     Retrieve the most recent decisions from memory.
 
     This enables the agent to potentially learn from past decisions
-    or provide context-aware responses.
+    or provide context-aware responses. Up to _RECENT_SIZE decisions are
+    served from memory.
 
     Args:
         limit (int): Maximum number of decisions to retrieve
@@ -175,33 +536,91 @@ def retrieve_recent_decisions(limit=10):
     Returns:
         list: List of recent decision records
     """
-    if not DB_PATH.exists():
+    global _RECENT
+
+    if not _ready():
         return []
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    flush_decisions()
 
-    cursor.execute("""
+    if not 0 <= limit <= _RECENT_SIZE:
+        with _READ_LOCK:
+            rows = _recent_rows(_read_connection(), limit)
+        return [_record(row) for row in rows]
+
+    # Loaded under the write lock, so no commit can slip in between the
+    # query and the writer keeping the deque current
+    with _LOCK:
+        if _RECENT is None:
+            _RECENT = deque(
+                ((row[1], _record(row)) for row in _recent_rows(_connection(), _RECENT_SIZE)),
+                maxlen=_RECENT_SIZE
+            )
+        return [dict(record) for _, record in itertools.islice(_RECENT, limit)]
+
+
+def _recent_rows(conn, limit):
+    """The newest rows, newest first (all of them for a negative limit)."""
+    return conn.execute("""
         SELECT audit_id, timestamp, decision, reason, execution_trace
         FROM audit_events
         ORDER BY timestamp DESC
         LIMIT ?
-    """, (limit,))
+    """, (limit,)).fetchall()
+
 
-    rows = cursor.fetchall()
-    conn.close()
+_STREAM_PAGE = 200  # rows fetched per query while streaming history
 
-    decisions = []
-    for row in rows:
-        decisions.append({
-            "audit_id": row[0],
-            "timestamp": row[1],
-            "decision": row[2],
-            "reason": row[3],
-            "execution_trace": json.loads(row[4])
-        })
 
-    return decisions
+def stream_recent_decisions(limit=1000):
+    """
+    Yield the most recent decisions as JSON Lines, one encoded record each.
+
+    Rows are read a page at a time and each stored trace is spliced in as
+    the JSON it already is, so memory stays flat whatever the limit and no
+    trace is parsed. The read lock is only held while a page is fetched.
+
+    Args:
+        limit (int): Maximum number of decisions (all of them if negative)
+
+    Yields:
+        bytes: One JSON object followed by a newline per decision
+    """
+    if not _ready():
+        return
+
+    flush_decisions()
+
+    encode = orjson.dumps if orjson is not None else (lambda obj: json.dumps(obj).encode())
+    remaining = limit if limit >= 0 else float("inf")
+    # Keyset paging: each page starts below the (timestamp, id) it ended on
+    after = (float("inf"), 0)
+
+    while remaining > 0:
+        page = int(min(remaining, _STREAM_PAGE))
+        with _READ_LOCK:
+            rows = _read_connection().execute("""
+                SELECT id, audit_id, timestamp, decision, reason, execution_trace
+                FROM audit_events
+                WHERE (timestamp, id) < (?, ?)
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """, after + (page,)).fetchall()
+
+        for row_id, audit_id, timestamp, decision, reason, trace in rows:
+            head = encode({
+                "audit_id": audit_id,
+                "timestamp": _format_timestamp(timestamp),
+                "decision": decision,
+                "reason": reason
+            })
+            trace = zlib.decompress(trace) if isinstance(trace, bytes) else trace.encode()
+            yield head[:-1] + b',"execution_trace":' + trace + b'}\n'
+
+        if len(rows) < page:
+            return
+        remaining -= len(rows)
+        after = (rows[-1][2], rows[-1][0])
 
 
 def get_decision_statistics():
@@ -213,7 +632,7 @@ def get_decision_statistics():
     Returns:
         dict: Statistics including total decisions, decision breakdown, etc.
     """
-    if not DB_PATH.exists():
+    if not _ready():
         return {
             "total_decisions": 0,
             "blocked": 0,
@@ -221,26 +640,17 @@ def get_decision_statistics():
             "allowed": 0
         }
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Total decisions
-    cursor.execute("SELECT COUNT(*) FROM audit_events")
-    total = cursor.fetchone()[0]
-
-    # Blocked decisions
-    cursor.execute("SELECT COUNT(*) FROM audit_events WHERE decision = 'BLOCK'")
-    blocked = cursor.fetchone()[0]
-
-    # Sanitized decisions
-    cursor.execute("SELECT COUNT(*) FROM audit_events WHERE decision = 'SANITIZE'")
-    sanitized = cursor.fetchone()[0]
-
-    # Allowed decisions
-    cursor.execute("SELECT COUNT(*) FROM audit_events WHERE decision = 'ALLOW'")
-    allowed = cursor.fetchone()[0]
+    flush_decisions()
 
-    conn.close()
+    # Total, blocked, sanitized and allowed decisions in a single scan
+    with _READ_LOCK:
+        total, blocked, sanitized, allowed = _read_connection().execute("""
+            SELECT COUNT(*),
+                   COALESCE(SUM(decision = 'BLOCK'), 0),
+                   COALESCE(SUM(decision = 'SANITIZE'), 0),
+                   COALESCE(SUM(decision = 'ALLOW'), 0)
+            FROM audit_events
+        """).fetchone()
 
     return {
         "total_decisions": total,
@@ -257,15 +667,23 @@ def clear_memory():
 
     WARNING: This is destructive and should only be used for testing
     or maintenance purposes.
+
+    The unfiltered DELETE already takes SQLite's truncate path (no per-row
+    work); VACUUM then hands the freed pages back and the WAL checkpoint
+    truncates the log VACUUM wrote, so the files actually shrink.
     """
-    if not DB_PATH.exists():
+    global _RECENT
+
+    if not _ready():
         return
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    flush_decisions()
 
-    cursor.execute("DELETE FROM audit_events")
-    conn.commit()
-    conn.close()
+    with _LOCK:
+        conn = _connection()
+        conn.execute("DELETE FROM audit_events")
+        _RECENT = None
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
-    print("[MEMORY] All decision records cleared")
+    logger.info("All decision records cleared")
@@ -4,6 +4,7 @@ Test script for LeakLock AI complete agentic system
 Demonstrates the dynamic flow with all agents
 """
 
+import asyncio
 import sys
 import os
 import json
@@ -11,7 +12,7 @@ import json
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from planner import plan_and_execute
+from planner import plan_and_execute_async
 from memory import init_memory
 
 # Initialize database
@@ -22,134 +23,87 @@ print("LeakLock AI - Complete Agentic System Test")
 print("=" * 80)
 print()
 
-# Test Case 1: PII detected (email and phone)
-print("TEST CASE 1: PII Detection with Sanitization")
-print("-" * 80)
-test_input_1 = """
+# Test cases: (title, input, use case). Each one runs the full agent
+# workflow, mostly waiting on Gemini, so all of them run concurrently and
+# their results are printed afterwards in order.
+TEST_CASES = [
+    (
+        "TEST CASE 1: PII Detection with Sanitization",
+        """
 Please help me debug this issue. My email is john.doe@example.com and you can
 reach me at 555-123-4567 if you need more details about the authentication problem.
-"""
-
-print("Input:")
-print(test_input_1.strip())
-print()
-
-result_1 = plan_and_execute(test_input_1, use_case="debugging")
-
-print("\nRESULTS:")
-print(f"Decision: {result_1['decision']}")
-print(f"Risk Score: {result_1['risk_score']}/100")
-print(f"\nExplanation:")
-print(f"  {result_1['explanation']}")
-print(f"\nPolicy References:")
-for policy in result_1['policy_refs']:
-    print(f"  - {policy['id']}: {policy['summary']}")
-print(f"\nDetected Signals:")
-for signal in result_1['detected_signals']:
-    print(f"  - {signal['type']} ({signal['severity']}): {signal['description']}")
-print(f"\nExecution Trace:")
-for step in result_1.get('execution_trace', []):
-    # This won't be in the response but is logged to DB
-    pass
-if 'safe_prompt' in result_1:
-    print(f"\nSanitized Output:")
-    print(f"  {result_1['safe_prompt'][:200]}...")
-print(f"\nAudit ID: {result_1['audit_id']}")
-print()
-
-# Test Case 2: Secrets detected (early exit)
-print("\n" + "=" * 80)
-print("TEST CASE 2: Secrets Detection (Early Exit)")
-print("-" * 80)
-test_input_2 = """
+""",
+        "debugging"
+    ),
+    (
+        "TEST CASE 2: Secrets Detection (Early Exit)",
+        """
 I'm trying to connect to OpenAI API but getting errors. Here's my API key:
 sk-1234567890abcdefghijklmnopqrstuvwxyz
 Can you help me debug this?
-"""
-
-print("Input:")
-print(test_input_2.strip())
-print()
-
-result_2 = plan_and_execute(test_input_2, use_case="debugging")
-
-print("\nRESULTS:")
-print(f"Decision: {result_2['decision']}")
-print(f"Risk Score: {result_2['risk_score']}/100")
-print(f"\nExplanation:")
-print(f"  {result_2['explanation']}")
-print(f"\nPolicy References:")
-for policy in result_2['policy_refs']:
-    print(f"  - {policy['id']}: {policy['summary']}")
-print(f"\nDetected Signals:")
-for signal in result_2['detected_signals']:
-    print(f"  - {signal['type']} ({signal['severity']}): {signal['description']}")
-print(f"\nAudit ID: {result_2['audit_id']}")
-print()
-
-# Test Case 3: Clean content (no PII, no secrets)
-print("\n" + "=" * 80)
-print("TEST CASE 3: Clean Content (No Issues)")
-print("-" * 80)
-test_input_3 = """
+""",
+        "debugging"
+    ),
+    (
+        "TEST CASE 3: Clean Content (No Issues)",
+        """
 How do I implement a binary search tree in Python? I need help with the insertion
 and traversal methods.
-"""
-
-print("Input:")
-print(test_input_3.strip())
-print()
-
-result_3 = plan_and_execute(test_input_3, use_case="general")
-
-print("\nRESULTS:")
-print(f"Decision: {result_3['decision']}")
-print(f"Risk Score: {result_3['risk_score']}/100")
-print(f"\nExplanation:")
-print(f"  {result_3['explanation']}")
-print(f"\nPolicy References:")
-for policy in result_3['policy_refs']:
-    print(f"  - {policy['id']}: {policy['summary']}")
-print(f"\nDetected Signals:")
-for signal in result_3['detected_signals']:
-    print(f"  - {signal['type']} ({signal['severity']}): {signal['description']}")
-if 'safe_prompt' in result_3:
-    print(f"\nSanitized Output:")
-    print(f"  {result_3['safe_prompt'][:200]}...")
-print(f"\nAudit ID: {result_3['audit_id']}")
-print()
-
-# Test Case 4: Multiple PII types (email, phone, SSN)
-print("\n" + "=" * 80)
-print("TEST CASE 4: Multiple PII Types")
-print("-" * 80)
-test_input_4 = """
+""",
+        "general"
+    ),
+    (
+        "TEST CASE 4: Multiple PII Types",
+        """
 Customer support ticket: User with email jane.smith@company.com, phone
 (555) 987-6543, and SSN 123-45-6789 is reporting login issues.
-"""
-
-print("Input:")
-print(test_input_4.strip())
-print()
-
-result_4 = plan_and_execute(test_input_4, use_case="support")
-
-print("\nRESULTS:")
-print(f"Decision: {result_4['decision']}")
-print(f"Risk Score: {result_4['risk_score']}/100")
-print(f"\nExplanation:")
-print(f"  {result_4['explanation']}")
-print(f"\nPolicy References:")
-for policy in result_4['policy_refs']:
-    print(f"  - {policy['id']}: {policy['summary']}")
-print(f"\nDetected Signals:")
-for signal in result_4['detected_signals']:
-    print(f"  - {signal['type']} ({signal['severity']}): {signal['description']}")
-if 'safe_prompt' in result_4:
-    print(f"\nSanitized Output:")
-    print(f"  {result_4['safe_prompt'][:200]}...")
-print(f"\nAudit ID: {result_4['audit_id']}")
-print()
+""",
+        "support"
+    ),
+]
+MAX_CONCURRENT_CASES = 4  # Bounds the Gemini calls in flight
+
+
+async def run_all_cases():
+    """Run every test case through the planner concurrently, in TEST_CASES order."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CASES)
+
+    async def run_case(test_input, use_case):
+        async with semaphore:
+            return await plan_and_execute_async(test_input, use_case=use_case)
+
+    return await asyncio.gather(*(
+        run_case(test_input, use_case) for _, test_input, use_case in TEST_CASES
+    ))
+
+
+results = asyncio.run(run_all_cases())
+
+for index, ((title, test_input, _), result) in enumerate(zip(TEST_CASES, results)):
+    if index:
+        print("\n" + "=" * 80)
+    print(title)
+    print("-" * 80)
+    print("Input:")
+    print(test_input.strip())
+    print()
+
+    print("\nRESULTS:")
+    print(f"Decision: {result['decision']}")
+    print(f"Risk Score: {result['risk_score']}/100")
+    print(f"\nExplanation:")
+    print(f"  {result['explanation']}")
+    print(f"\nPolicy References:")
+    for policy in result['policy_refs']:
+        print(f"  - {policy['id']}: {policy['summary']}")
+    print(f"\nDetected Signals:")
+    for signal in result['detected_signals']:
+        print(f"  - {signal['type']} ({signal['severity']}): {signal['description']}")
+    if 'safe_prompt' in result:
+        print(f"\nSanitized Output:")
+        print(f"  {result['safe_prompt'][:200]}...")
+    print(f"\nAudit ID: {result['audit_id']}")
+    print()
 
 print("=" * 80)
 print("All test cases completed!")
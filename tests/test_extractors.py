@@ -0,0 +1,129 @@
+"""
+Tests for the streaming Office extractors (extractors.py).
+
+The XLSX and DOCX readers parse the package XML themselves rather than
+going through openpyxl / python-docx; these cases build documents with
+those libraries and check that both paths produce the same text.
+"""
+
+import datetime
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+openpyxl = pytest.importorskip("openpyxl")
+docx = pytest.importorskip("docx")
+
+from extractors import (
+    _stream_docx_text,
+    _stream_xlsx_lines,
+    extract_text_locally_from_docx,
+    extract_text_locally_from_xlsx,
+)
+
+
+def openpyxl_lines(path):
+    """Workbook lines as read through openpyxl, as the extractor originally did."""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    lines = []
+    for sheet_name in workbook.sheetnames:
+        lines.append(f"[Sheet: {sheet_name}]")
+        for row in workbook[sheet_name].iter_rows(values_only=True):
+            row_text = " | ".join([str(cell) if cell is not None else "" for cell in row])
+            if row_text.strip():
+                lines.append(row_text)
+    workbook.close()
+    return lines
+
+
+def python_docx_text(path):
+    """(paragraphs, table rows) as read through python-docx, as the extractor originally did."""
+    doc = docx.Document(path)
+    paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+    table_texts = []
+    for table in doc.tables:
+        for row in table.rows:
+            row_text = " | ".join([cell.text for cell in row.cells])
+            if row_text.strip():
+                table_texts.append(row_text)
+    return paragraphs, table_texts
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Data"
+    sheet.append(["name", "email", "count", "ratio", "active"])
+    sheet.append(["Ada", "ada@example.com", 3, 0.25, True])
+    sheet.append(["Bob", None, -7, 1e20, False])
+    sheet["A5"] = datetime.datetime(2024, 5, 1, 12, 30)
+    sheet["B5"] = datetime.date(2024, 5, 2)
+    sheet["C5"] = datetime.time(8, 15, 30)
+    sheet["D5"] = "=SUM(C2:C3)"
+    sheet["G9"] = "sparse corner"
+
+    notes = workbook.create_sheet("Notes")
+    notes["C3"] = "token=abc123"
+    notes["A1"] = "first"
+    workbook.create_sheet("Empty")
+
+    path = tmp_path / "book.xlsx"
+    workbook.save(path)
+    return path
+
+
+def test_streamed_xlsx_matches_openpyxl(workbook_path):
+    streamed = _stream_xlsx_lines(str(workbook_path))
+    assert streamed is not None  # the streaming path handled the workbook itself
+    assert streamed == openpyxl_lines(workbook_path)
+
+    result = extract_text_locally_from_xlsx(str(workbook_path))
+    assert result["text"] == "\n".join(openpyxl_lines(workbook_path)).strip()
+
+
+@pytest.fixture
+def document_path(tmp_path):
+    document = docx.Document()
+    document.add_heading("Report", level=1)
+    paragraph = document.add_paragraph("Contact ")
+    paragraph.add_run("bob@example.com").bold = True
+    paragraph.add_run("\tend")
+    paragraph.add_run().add_break()
+    paragraph.add_run("next line")
+    document.add_paragraph("")
+    document.add_paragraph("   ")
+
+    table = document.add_table(rows=3, cols=2)
+    table.cell(0, 0).text = "key"
+    table.cell(0, 1).text = "value"
+    table.cell(1, 0).text = "api_key"
+    table.cell(1, 1).text = "sk-abc\nsecond paragraph"
+    document.add_paragraph("After the table")
+
+    path = tmp_path / "doc.docx"
+    document.save(path)
+    return path
+
+
+def test_streamed_docx_matches_python_docx(document_path):
+    streamed = _stream_docx_text(str(document_path))
+    assert streamed is not None  # the streaming path handled the document itself
+    assert streamed == python_docx_text(document_path)
+
+
+def test_merged_docx_cells_fall_back_to_python_docx(tmp_path):
+    document = docx.Document()
+    table = document.add_table(rows=2, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1)).text = "merged"
+    table.cell(1, 2).text = "plain"
+    path = tmp_path / "merged.docx"
+    document.save(path)
+
+    assert _stream_docx_text(str(path)) is None
+    paragraphs, table_texts = python_docx_text(path)
+    expected = "\n".join(paragraphs + ["\n[Tables]"] + table_texts).strip()
+    assert extract_text_locally_from_docx(str(path))["text"] == expected
@@ -13,8 +13,13 @@ Requirements:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import io
 import os
 import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
 
@@ -23,6 +28,13 @@ import json
 BASE_URL = "http://localhost:8000"
 TEST_FILES_DIR = Path(__file__).parent.parent / "test_files"
 
+# One keep-alive session for every request; the tests run in parallel,
+# so the pool holds more connections than there are tests
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
 
 def print_section(title):
     """Print a formatted section header."""
@@ -38,10 +50,62 @@ def print_result(test_name, passed, message):
     print(f"   {message}")
 
 
+class _PerThreadStdout:
+    """sys.stdout stand-in that can send one thread's prints to its own buffer."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        return getattr(self._local, "buffer", self.stream).write(text)
+
+    def flush(self):
+        getattr(self._local, "buffer", self.stream).flush()
+
+    def capture(self, func):
+        """Call func, returning (its result, everything it printed)."""
+        self._local.buffer = io.StringIO()
+        try:
+            return func(), self._local.buffer.getvalue()
+        finally:
+            del self._local.buffer
+
+
+def _multipart_body(boundary, file_path, content_type, data):
+    """Yield a multipart/form-data body, reading the file from disk in chunks."""
+    for name, value in data.items():
+        yield (f'--{boundary}\r\n'
+               f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+               f'{value}\r\n').encode()
+    yield (f'--{boundary}\r\n'
+           f'Content-Disposition: form-data; name="file"; filename="{file_path.name}"\r\n'
+           f'Content-Type: {content_type}\r\n\r\n').encode()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+    yield f'\r\n--{boundary}--\r\n'.encode()
+
+
+def post_file(file_path, content_type, data):
+    """
+    Upload a file to /analyze-file without loading it into memory.
+
+    requests buffers files= uploads whole; a generator body is sent with
+    chunked transfer encoding instead, straight from disk.
+    """
+    boundary = uuid.uuid4().hex
+    return SESSION.post(
+        f"{BASE_URL}/analyze-file",
+        data=_multipart_body(boundary, file_path, content_type, data),
+        headers={'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    )
+
+
 def check_server_health():
     """Check if the LeakLockAI server is running."""
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
+        response = SESSION.get(f"{BASE_URL}/health", timeout=5)
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Server is healthy")
@@ -73,10 +137,7 @@ def test_safe_document():
         return False
 
     try:
-        with open(file_path, 'rb') as f:
-            files = {'file': ('safe_document.txt', f, 'text/plain')}
-            data = {'use_case': 'general'}
-            response = requests.post(f"{BASE_URL}/analyze-file", files=files, data=data)
+        response = post_file(file_path, 'text/plain', {'use_case': 'general'})
 
         if response.status_code != 200:
             print_result(test_name, False, f"HTTP {response.status_code}: {response.text}")
@@ -114,10 +175,7 @@ def test_terminal_with_secrets():
         return False
 
     try:
-        with open(file_path, 'rb') as f:
-            files = {'file': ('terminal_with_secrets.txt', f, 'text/plain')}
-            data = {'use_case': 'debugging'}
-            response = requests.post(f"{BASE_URL}/analyze-file", files=files, data=data)
+        response = post_file(file_path, 'text/plain', {'use_case': 'debugging'})
 
         if response.status_code != 200:
             print_result(test_name, False, f"HTTP {response.status_code}: {response.text}")
@@ -174,10 +232,7 @@ def test_document_with_pii():
         return False
 
     try:
-        with open(file_path, 'rb') as f:
-            files = {'file': ('document_with_pii.txt', f, 'text/plain')}
-            data = {'use_case': 'document_analysis'}
-            response = requests.post(f"{BASE_URL}/analyze-file", files=files, data=data)
+        response = post_file(file_path, 'text/plain', {'use_case': 'document_analysis'})
 
         if response.status_code != 200:
             print_result(test_name, False, f"HTTP {response.status_code}: {response.text}")
@@ -218,7 +273,7 @@ def test_unsupported_file_type():
         # Create a fake file with unsupported extension
         files = {'file': ('test.xyz', b'This is a test', 'application/octet-stream')}
         data = {'use_case': 'general'}
-        response = requests.post(f"{BASE_URL}/analyze-file", files=files, data=data)
+        response = SESSION.post(f"{BASE_URL}/analyze-file", files=files, data=data)
 
         if response.status_code != 200:
             print_result(test_name, False, f"HTTP {response.status_code}")
@@ -257,11 +312,27 @@ def main():
     # Run all tests
     print_section("Running Test Cases")
 
-    results = []
-    results.append(("Safe Document", test_safe_document()))
-    results.append(("Terminal with Secrets", test_terminal_with_secrets()))
-    results.append(("Document with PII", test_document_with_pii()))
-    results.append(("Unsupported File Type", test_unsupported_file_type()))
+    tests = [
+        ("Safe Document", test_safe_document),
+        ("Terminal with Secrets", test_terminal_with_secrets),
+        ("Document with PII", test_document_with_pii),
+        ("Unsupported File Type", test_unsupported_file_type),
+    ]
+
+    # The tests run in parallel; each one's output is buffered and printed
+    # in the order above once it finishes
+    stdout = _PerThreadStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+            futures = [(name, pool.submit(stdout.capture, test)) for name, test in tests]
+            results = []
+            for name, future in futures:
+                passed, output = future.result()
+                print(output, end="")
+                results.append((name, passed))
+    finally:
+        sys.stdout = stdout.stream
 
     # Summary
     print_section("Test Summary")
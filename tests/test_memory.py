@@ -0,0 +1,141 @@
+"""
+Tests for the audit store (memory.py).
+
+Each test points memory.DB_PATH at a fresh database file; log_decision()
+only queues rows, so these also cover the background writer.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import memory
+
+
+@pytest.fixture(autouse=True)
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory, "DB_PATH", tmp_path / "leaklock.db")
+    yield
+    memory.flush_decisions()
+
+
+def log(n, decision="SANITIZE"):
+    """Log n decisions and return their audit_ids, oldest first."""
+    return [
+        memory.log_decision(decision, f"reason {i}", ["step"], memory.new_audit_id())
+        for i in range(n)
+    ]
+
+
+def test_reads_wait_for_queued_rows(monkeypatch):
+    write_events = memory._write_events
+
+    def slow_write(rows):
+        time.sleep(0.2)
+        return write_events(rows)
+
+    monkeypatch.setattr(memory, "_write_events", slow_write)
+    audit_ids = log(5)
+
+    assert memory.retrieve_decision(audit_ids[-1])["reason"] == "reason 4"
+    assert [r["audit_id"] for r in memory.retrieve_recent_decisions(5)] == audit_ids[::-1]
+    assert memory.get_decision_statistics()["total_decisions"] == 5
+
+
+def test_duplicate_audit_id_keeps_other_rows(caplog):
+    with caplog.at_level(logging.WARNING, logger="memory"):
+        memory.log_decision("BLOCK", "first", ["a"], "dup")
+        memory.log_decision("SANITIZE", "second", ["b"], "dup")
+        memory.log_decision("SANITIZE", "other", ["c"], "other")
+        memory.flush_decisions()
+
+    assert memory.retrieve_decision("dup")["reason"] == "first"
+    assert memory.retrieve_decision("other")["reason"] == "other"
+    assert memory.get_decision_statistics()["total_decisions"] == 2
+    assert "Duplicate audit_id dup" in caplog.text
+
+
+def test_bad_trace_is_skipped_and_writer_survives(monkeypatch):
+    def format_trace(trace):
+        if trace == ["bad"]:
+            raise ValueError("cannot render")
+        return list(trace)
+
+    monkeypatch.setattr(memory, "_format_trace", format_trace)
+    memory.log_decision("SANITIZE", "good", ["ok"], "good")
+    memory.log_decision("SANITIZE", "bad", ["bad"], "bad")
+    memory.flush_decisions()
+    memory.log_decision("SANITIZE", "later", ["ok"], "later")
+
+    assert memory.retrieve_decision("good") is not None
+    assert memory.retrieve_decision("bad") is None
+    assert memory.retrieve_decision("later") is not None
+
+
+def test_upgrades_text_timestamp_database():
+    memory.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(memory.DB_PATH)
+    # Schema and row format of databases written before timestamps were integers
+    conn.execute("""
+        CREATE TABLE audit_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            audit_id TEXT UNIQUE NOT NULL,
+            timestamp TEXT NOT NULL,
+            decision TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            execution_trace TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(
+        "INSERT INTO audit_events (audit_id, timestamp, decision, reason, execution_trace) "
+        "VALUES (?, ?, ?, ?, ?)",
+        ("legacy", "2024-05-01T12:34:56.789012", "BLOCK", "old", json.dumps(["x", "y"]))
+    )
+    conn.commit()
+    conn.close()
+
+    record = memory.retrieve_decision("legacy")
+    assert record["timestamp"] == "2024-05-01T12:34:56.789012"
+    assert record["execution_trace"] == ["x", "y"]
+
+    conn = sqlite3.connect(memory.DB_PATH)
+    columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(audit_events)")}
+    conn.close()
+    assert columns["timestamp"] == "INTEGER"
+
+    # New rows sort after the converted one
+    memory.log_decision("SANITIZE", "new", ["z"], "new")
+    assert [r["audit_id"] for r in memory.retrieve_recent_decisions(2)] == ["new", "legacy"]
+
+
+def test_stream_pages_newest_first(monkeypatch):
+    monkeypatch.setattr(memory, "_STREAM_PAGE", 3)
+    audit_ids = log(10)
+
+    lines = list(memory.stream_recent_decisions(7))
+    records = [json.loads(line) for line in lines]
+    assert all(line.endswith(b"\n") for line in lines)
+    assert [r["audit_id"] for r in records] == audit_ids[::-1][:7]
+    assert records[0]["execution_trace"] == ["step"]
+
+    assert len(list(memory.stream_recent_decisions(-1))) == 10
+    assert len(list(memory.stream_recent_decisions(9))) == 9
+
+
+def test_clear_memory_resets_recent_decisions():
+    log(3)
+    assert len(memory.retrieve_recent_decisions(10)) == 3  # loads the in-memory deque
+
+    memory.clear_memory()
+    assert memory.retrieve_recent_decisions(10) == []
+
+    audit_id = memory.log_decision("BLOCK", "after clear", ["a"], memory.new_audit_id())
+    assert [r["audit_id"] for r in memory.retrieve_recent_decisions(10)] == [audit_id]